@@ -27,6 +27,10 @@ from read_preprocess_data import read_metric, build_dataframe, find_sunrise_set,
 from clearsky_day import ClearSkyDay
 from Labelling_FIMER import find_clipping, DC0_generation, Inverter_Tripping, grid_overvoltage, blackout, \
     undersize_mppt_InVol, DCside_issue_gen0, volt_watt, volt_var, inverter_clipping, DCside_issue_flat_generation
+from threshold_sweep import build_threshold_grid, sweep_monitor, align_reference, summarise_sweep, sweep_label_names
+from event_store import FaultEventStore
+from sharding import MonitorWorkQueue, run_worker, read_checkpoint
+from daily_rollup import build_daily_rollup, DailyRollupTable
 
 import warnings
 warnings.filterwarnings('ignore')
@@ -73,6 +77,12 @@ class FIMER_DCAC_Labelling():
         self.time_end = time_end
         self.df_monitors = df_monitors
         self.df_sites = df_sites
+        # daily rollup of the 5-minute data & labels, updated for each labelled monitor
+        self.daily_rollup = DailyRollupTable()
+        # raw data of the whole fleet, read by read_all_rawdata
+        # (None: only the columns of each monitor are read when it is labelled, see read_monitor_rawdata)
+        self.df_ac_current, self.df_ac_power, self.df_ac_freq, self.df_ac_voltage = None, None, None, None
+        self.df_dc_current, self.df_dc_power, self.df_dc_voltage = None, None, None
 
         time_index5min = pd.date_range(start=pd.to_datetime(self.time_start),
                                        end=pd.to_datetime(self.time_end),
@@ -138,9 +148,12 @@ class FIMER_DCAC_Labelling():
             df_5min.to_csv('../preprocessed_data/monitors_DCdata/{}.csv'.format(save_name), index=None)
 
 
-    def read_all_rawdata(self):
+    def check_rawdata_files(self):
         if not os.path.exists('../preprocessed_data/monitors_DCdata/AC Current(A).csv'):
             self.fetch_data_fromAWS()
+
+    def read_all_rawdata(self):
+        self.check_rawdata_files()
         # read AC data
         self.df_ac_current = pd.read_csv('../preprocessed_data/monitors_DCdata/AC Current(A).csv')
         self.df_ac_power = pd.read_csv('../preprocessed_data/monitors_DCdata/AC Power (Watt).csv')
@@ -152,6 +165,29 @@ class FIMER_DCAC_Labelling():
         self.df_dc_power = pd.read_csv('../preprocessed_data/monitors_DCdata/DC Power (Watt).csv')
         self.df_dc_voltage = pd.read_csv('../preprocessed_data/monitors_DCdata/DC Voltage(V).csv')
 
+    def read_monitor_rawdata(self, MID_full):
+        """
+        raw data of one monitor, taken from the whole-fleet dataframes if read_all_rawdata has been called,
+        otherwise only the columns of this monitor are read from the csv files
+        (sharded execution: the memory of a worker does not grow with the fleet)
+        :param MID_full: 'MNTR|...'
+        :return: DataFrame, 'time' + one column per metric
+        """
+        metric_frames = {'Gen.W': self.df_ac_power, 'Inv.AC.U.V': self.df_ac_voltage,
+                         'Inv.AC.I.A': self.df_ac_current, 'Inv.AC.Freq.Hz': self.df_ac_freq,
+                         'Inv.DC.P.W': self.df_dc_power, 'Inv.DC.U.V': self.df_dc_voltage}
+        df = None
+        for metric_name, df_metric in metric_frames.items():
+            if df_metric is None:
+                save_name = name_list[measure_name_list.index(metric_name)]
+                df_metric = pd.read_csv('../preprocessed_data/monitors_DCdata/{}.csv'.format(save_name),
+                                        usecols=['time', MID_full])
+            if df is None:
+                df = df_metric[['time', MID_full]].rename(columns={MID_full: metric_name})
+            else:
+                df[metric_name] = df_metric[MID_full].values
+        return df
+
     ## ==================== for each monitor ====================================
     def select_date_time(self, time_index5min_local, df, site_id, latitude, longitude):
         # select sunrise and sunset time
@@ -169,7 +205,7 @@ class FIMER_DCAC_Labelling():
 
         df = df[df['date'].isin(clearsky_date_list)]
         df.index = np.arange(len(df))
-        return df
+        return df, clearsky_date_list
 
     def processing_monitor(self, df, pv_size):
         df = preprocess_data(df=df, thred_missing_data=threshold_missing_data,
@@ -308,139 +344,322 @@ class FIMER_DCAC_Labelling():
             plt.savefig('results/plots_simple/{}/{}_{}.png'.format(metric_name, MID, date_id))
             plt.close()
 
+    def prepare_monitor(self, MID):
+        """
+        build the preprocessed (clear-sky, daytime, outlier-free) dataframe of one monitor
+        :param MID: monitor id without the 'MNTR|' prefix
+        :return: df, site_id, pv_size, df_raw (the whole period, before the clear-sky & daytime selection,
+                 with the clear-sky flag of each sample in 'clear_sky_day')
+        """
+        # #==================== Meta data  ==================
+        MID_full = str('MNTR|' + MID)
+        site_id = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'siteId'].iloc[0]
+        time_zone = self.df_sites.loc[self.df_sites['source'] == site_id, 'timezone'].values[0]
+
+        latitude = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'latitude'].values[0][1:]
+        latitude = float(latitude)
+        longitude = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'longitude'].values[0]
+        longitude = float(longitude)
+
+        pv_size = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'pvSizeWatt'].values[0]
+
+        # #============ raw data for each monitor ============
+        df = self.read_monitor_rawdata(MID_full=MID_full)
+        df['DC Current'] = df['Inv.DC.P.W'].div(df['Inv.DC.U.V']).replace(np.inf, 0)
+
+        # #====== Calculate the theoretical generation ==========
+        time_index5min_local = pd.date_range(start=pd.to_datetime(self.time_start).tz_localize(time_zone),
+                                             end=pd.to_datetime(self.time_end).tz_localize(time_zone),
+                                             freq='5min')
+        df_theoretical = get_irradiance(time_index5min_local=time_index5min_local, time_zone=time_zone,
+                                        tilt=tilt, surface_azimuth=azimuth, latitude=latitude,
+                                        longitude=longitude, pv_size=pv_size, loss_factor=loss_factor)
+        df['theoretical_P.W'] = df_theoretical['POA'].values
+        # #=========== time converter ================
+        df['time'] = pd.to_datetime(df['time'].values)
+        df['minute'] = df['time'].dt.minute
+        df['hour'] = df['time'].dt.hour
+        df['date'] = df['time'].dt.date
+        df['date'] = df['date'].astype(pd.StringDtype())
+
+        # #====== clear-sky days & sunrise sunset time =============
+        df_raw = df
+        df, clearsky_date_list = self.select_date_time(time_index5min_local=time_index5min_local, df=df,
+                                                       site_id=site_id, latitude=latitude, longitude=longitude)
+        df_raw['clear_sky_day'] = df_raw['date'].isin(clearsky_date_list)
+
+        # #====== Preprocessing data: outlier & missing data =============
+        df = self.processing_monitor(df=df, pv_size=pv_size)
+        return df, site_id, pv_size, df_raw
+
+    def label_monitor(self, MID):
+        """
+        label the faults of one monitor, the results are saved in the dataframes of the labels (self.label_frames)
+        :param MID: monitor id without the 'MNTR|' prefix
+        :return: daily rollup of the monitor
+        """
+        MID_full = str('MNTR|' + MID)
+        df, site_id, pv_size, df_raw = self.prepare_monitor(MID=MID)
+
+        # # #===============================================================
+        # # #  Start Labelling: AC generation is zero
+        # # #===============================================================
+        # # #====== DC zero Generation =============
+        # df = self.DC0_Labelling(df=df)
+        # self.df_DC0[MID_full] = self.df_DC0['time'].map(df.set_index('time')['DC Zero Generation']).values
+        # # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DC Zero Generation')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='DC Zero Generation')
+        #
+        # # #====== Grid Overvoltage & Inverter tripping =========
+        # df = self.grid_overvoltage_labelling(df=df)
+        # self.df_GridOverVol[MID] = self.df_GridOverVol['time'].map(df.set_index('time')['grid_overVol']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='grid_overVol')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='grid_overVol')
+        #
+        # # #====== AC Voltage sensor malfuncttion (or blackout) =============
+        # df = self.blackout_labelling(df=df)
+        # self.df_Blackout[MID] = self.df_Blackout['time'].map(df.set_index('time')['blakout']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='blakout')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='blakout')
+        #
+        # # #====== Undersized MPPT input Voltage =============
+        # df = self.undersize_mpptVol_labelling(df=df)
+        # self.df_Undersize_MPPT[MID] = self.df_Undersize_MPPT['time'].map(df.set_index('time')['undersize_mppt_InVol']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='undersize_mppt_InVol')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='undersize_mppt_InVol')
+        #
+        # # #====== DC-side Issues with zero AC generation =============
+        # df = self.dcside_gen0_issue_labelling(df=df)
+        # self.df_DCissue_Gen0[MID] = self.df_DCissue_Gen0['time'].map(df.set_index('time')['DC_issue_Gen0']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DC_issue_Gen0')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='DC_issue_Gen0')
+        #
+        # # #====== DC-side Issues with zero AC generation =============
+        # df = self.dcside_gen0_issue_labelling(df=df)
+        # self.df_DCissue_Gen0[MID] = self.df_DCissue_Gen0['time'].map(df.set_index('time')['DC_issue_Gen0']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DC_issue_Gen0')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='DC_issue_Gen0')
+        # # #===============================================================
+        # # #  Labelling: AC generation is Flat
+        # # #===============================================================
+        diff_name, metric_name = 'AC', 'Gen.W'
+        df = self.Flat_Generation(df=df, pv_size=pv_size, diff_name=diff_name, metric_name=metric_name)
+        # # #====== Volt-Watt =============
+        # df = self.volt_watt_labelling(df=df, diff_name=diff_name)
+        # self.df_Volt_Watt[MID] = self.df_Volt_Watt['time'].map(df.set_index('time')['volt_watt']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='volt_watt')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='volt_watt')
+        #
+        # # #====== Volt-Var =============
+        # df = self.volt_var_labelling(df=df, diff_name=diff_name)
+        # self.df_Volt_Var[MID] = self.df_Volt_Var['time'].map(df.set_index('time')['volt_var']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='volt_var')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='volt_var')
+
+        # #====== Inverter Clipping =============
+        df = self.inverter_clipping_labelling(df=df, diff_name=diff_name)
+        self.df_Inverter_Clipping[MID] = self.df_Inverter_Clipping['time'].map(df.set_index('time')['inverter_clipping']).values
+        self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='inverter_clipping')
+        self.plot_simple_results(df=df, MID=MID, metric_name='inverter_clipping')
+
+        # # #====== DC-side issue with flat generation =============
+        # df = self.DCside_flatGen_issue_labelling(df=df, diff_name=diff_name)
+        # self.df_DCissue_FlatGen[MID] = self.df_DCissue_FlatGen['time'].map(
+        #     df.set_index('time')['DCside_issue_flat']).values
+        # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DCside_issue_flat')
+        # self.plot_simple_results(df=df, MID=MID, metric_name='DCside_issue_flat')
+
+        # #====== Daily rollup =============
+        return build_daily_rollup(df_raw=df_raw, df_labelled=df, monitor=MID_full,
+                                  label_names=list(self.label_frames.keys()))
+
+    @property
+    def label_frames(self):
+        return {'DC Zero Generation': self.df_DC0, 'grid_overVol': self.df_GridOverVol,
+                'blakout': self.df_Blackout, 'undersize_mppt_InVol': self.df_Undersize_MPPT,
+                'DC_issue_Gen0': self.df_DCissue_Gen0, 'volt_watt': self.df_Volt_Watt,
+                'volt_var': self.df_Volt_Var, 'inverter_clipping': self.df_Inverter_Clipping,
+                'DCside_issue_flat': self.df_DCissue_FlatGen}
+
     def Labelling_Process(self):
         # #========== read raw data of all fimer monitors =======
         self.read_all_rawdata()
         # #==================== each monitor  ===================
-        for MID in self.fimer_list:
-            # #==================== Meta data  ==================
-            MID_full = str('MNTR|' + MID)
-            site_id = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'siteId'].iloc[0]
-            time_zone = self.df_sites.loc[self.df_sites['source'] == site_id, 'timezone'].values[0]
-
-            latitude = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'latitude'].values[0][1:]
-            latitude = float(latitude)
-            longitude = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'longitude'].values[0]
-            longitude = float(longitude)
-
-            pv_size = self.df_monitors.loc[self.df_monitors['source'] == MID_full, 'pvSizeWatt'].values[0]
-
-            # #============ raw data for each monitor ============
-            df = self.df_ac_power[['time', MID_full]].copy()
-            df.rename(columns={MID_full: 'Gen.W'}, inplace=True)
-            df['Inv.AC.U.V'] = self.df_ac_voltage[MID_full].values
-            df['Inv.AC.I.A'] = self.df_ac_current[MID_full].values
-            df['Inv.AC.Freq.Hz'] = self.df_ac_freq[MID_full].values
-            df['Inv.DC.P.W'] = self.df_dc_power[MID_full].values
-            df['Inv.DC.U.V'] = self.df_dc_voltage[MID_full].values
-            df['DC Current'] = df['Inv.DC.P.W'].div(df['Inv.DC.U.V']).replace(np.inf, 0)
-
-            # #====== Calculate the theoretical generation ==========
-            time_index5min_local = pd.date_range(start=pd.to_datetime(self.time_start).tz_localize(time_zone),
-                                                 end=pd.to_datetime(self.time_end).tz_localize(time_zone),
-                                                 freq='5min')
-            df_theoretical = get_irradiance(time_index5min_local=time_index5min_local, time_zone=time_zone,
-                                            tilt=tilt, surface_azimuth=azimuth, latitude=latitude,
-                                            longitude=longitude, pv_size=pv_size, loss_factor=loss_factor)
-            df['theoretical_P.W'] = df_theoretical['POA'].values
-            # #=========== time converter ================
-            df['time'] = pd.to_datetime(df['time'].values)
-            df['minute'] = df['time'].dt.minute
-            df['hour'] = df['time'].dt.hour
-            df['date'] = df['time'].dt.date
-            df['date'] = df['date'].astype(pd.StringDtype())
-
-            # #====== clear-sky days & sunrise sunset time =============
-            df = self.select_date_time(time_index5min_local=time_index5min_local, df=df, site_id=site_id,
-                                       latitude=latitude, longitude=longitude)
-
-            # #====== Preprocessing data: outlier & missing data =============
-            df = self.processing_monitor(df=df, pv_size=pv_size)
-
-            # # #===============================================================
-            # # #  Start Labelling: AC generation is zero
-            # # #===============================================================
-            # # #====== DC zero Generation =============
-            # df = self.DC0_Labelling(df=df)
-            # self.df_DC0[MID_full] = self.df_DC0['time'].map(df.set_index('time')['DC Zero Generation']).values
-            # # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DC Zero Generation')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='DC Zero Generation')
-            #
-            # # #====== Grid Overvoltage & Inverter tripping =========
-            # df = self.grid_overvoltage_labelling(df=df)
-            # self.df_GridOverVol[MID] = self.df_GridOverVol['time'].map(df.set_index('time')['grid_overVol']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='grid_overVol')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='grid_overVol')
-            #
-            # # #====== AC Voltage sensor malfuncttion (or blackout) =============
-            # df = self.blackout_labelling(df=df)
-            # self.df_Blackout[MID] = self.df_Blackout['time'].map(df.set_index('time')['blakout']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='blakout')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='blakout')
-            #
-            # # #====== Undersized MPPT input Voltage =============
-            # df = self.undersize_mpptVol_labelling(df=df)
-            # self.df_Undersize_MPPT[MID] = self.df_Undersize_MPPT['time'].map(df.set_index('time')['undersize_mppt_InVol']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='undersize_mppt_InVol')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='undersize_mppt_InVol')
-            #
-            # # #====== DC-side Issues with zero AC generation =============
-            # df = self.dcside_gen0_issue_labelling(df=df)
-            # self.df_DCissue_Gen0[MID] = self.df_DCissue_Gen0['time'].map(df.set_index('time')['DC_issue_Gen0']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DC_issue_Gen0')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='DC_issue_Gen0')
-            #
-            # # #====== DC-side Issues with zero AC generation =============
-            # df = self.dcside_gen0_issue_labelling(df=df)
-            # self.df_DCissue_Gen0[MID] = self.df_DCissue_Gen0['time'].map(df.set_index('time')['DC_issue_Gen0']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DC_issue_Gen0')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='DC_issue_Gen0')
-            # # #===============================================================
-            # # #  Labelling: AC generation is Flat
-            # # #===============================================================
-            diff_name, metric_name = 'AC', 'Gen.W'
-            df = self.Flat_Generation(df=df, pv_size=pv_size, diff_name=diff_name, metric_name=metric_name)
-            # # #====== Volt-Watt =============
-            # df = self.volt_watt_labelling(df=df, diff_name=diff_name)
-            # self.df_Volt_Watt[MID] = self.df_Volt_Watt['time'].map(df.set_index('time')['volt_watt']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='volt_watt')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='volt_watt')
-            #
-            # # #====== Volt-Var =============
-            # df = self.volt_var_labelling(df=df, diff_name=diff_name)
-            # self.df_Volt_Var[MID] = self.df_Volt_Var['time'].map(df.set_index('time')['volt_var']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='volt_var')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='volt_var')
-
-            # #====== Inverter Clipping =============
-            df = self.inverter_clipping_labelling(df=df, diff_name=diff_name)
-            self.df_Inverter_Clipping[MID] = self.df_Inverter_Clipping['time'].map(df.set_index('time')['inverter_clipping']).values
-            self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='inverter_clipping')
-            self.plot_simple_results(df=df, MID=MID, metric_name='inverter_clipping')
-
-            # # #====== DC-side issue with flat generation =============
-            # df = self.DCside_flatGen_issue_labelling(df=df, diff_name=diff_name)
-            # self.df_DCissue_FlatGen[MID] = self.df_DCissue_FlatGen['time'].map(
-            #     df.set_index('time')['DCside_issue_flat']).values
-            # self.plot_results(df=df, site_id=site_id, MID=MID, metric_name='DCside_issue_flat')
-            # self.plot_simple_results(df=df, MID=MID, metric_name='DCside_issue_flat')
+        daily_list = [self.label_monitor(MID=MID) for MID in self.fimer_list]
+        # one upsert for the whole fleet (each upsert re-sorts the table)
+        if daily_list:
+            self.daily_rollup.upsert(pd.concat(daily_list, ignore_index=True))
 
+        self.save_results()
 
+    def save_results(self):
         # # save final labelling results
-        # self.df_DC0.to_csv('results/df_DC_zero_generation.csv')
-        # self.df_GridOverVol.to_csv('results/df_grid_OverVoltage.csv')
-        # self.df_Blackout.to_csv('results/df_blackout.csv')
-        # self.df_Undersize_MPPT.to_csv('results/df_undersized_MPPT.csv')
-        # self.df_DCissue_Gen0.to_csv('results/df_dcissue_gen0.csv')
-        # self.df_Volt_Watt.to_csv('results/df_volt_watt.csv')
-        # self.df_Volt_Var.to_csv('results/df_volt_var.csv')
-        # self.df_Inverter_Clipping.to_csv('results/df_inverter_clipping.csv')
-        # self.df_DCissue_FlatGen.to_csv('results/df_dcissue_flatGen.csv')
-
-time_start = '2022-09-06'
-time_end = '2023-04-30'
-df_sites = pd.read_csv('../input_data/SITE_nodeType_20230321.csv')
-df_monitors = pd.read_csv('../input_data/MNTR_ddb_20230419.csv')
-fimer_labelling = FIMER_DCAC_Labelling(time_start, time_end, df_monitors, df_sites)
-
-fimer_labelling.Labelling_Process()
+        if not os.path.exists('results'):
+            os.makedirs('results')
+        result_files = {'DC Zero Generation': 'results/df_DC_zero_generation.csv',
+                        'grid_overVol': 'results/df_grid_OverVoltage.csv',
+                        'blakout': 'results/df_blackout.csv',
+                        'undersize_mppt_InVol': 'results/df_undersized_MPPT.csv',
+                        'DC_issue_Gen0': 'results/df_dcissue_gen0.csv',
+                        'volt_watt': 'results/df_volt_watt.csv',
+                        'volt_var': 'results/df_volt_var.csv',
+                        'inverter_clipping': 'results/df_inverter_clipping.csv',
+                        'DCside_issue_flat': 'results/df_dcissue_flatGen.csv'}
+        for label_name, df_label in self.label_frames.items():
+            # only the labels that have been run (with at least one monitor column)
+            if len(df_label.columns) > 1:
+                df_label.to_csv(result_files[label_name])
+
+        # # save the labelling results as fault events for fast queries
+        self.build_event_store().save('results/fault_events.npz')
+
+        # # merge the daily rollup into the saved one (the previous runs may cover other monitors or dates)
+        if os.path.exists('results/daily_rollup.npz'):
+            daily_rollup = DailyRollupTable.load('results/daily_rollup.npz')
+            daily_rollup.upsert(self.daily_rollup.df_rollup)
+        else:
+            daily_rollup = self.daily_rollup
+        daily_rollup.save('results/daily_rollup.npz')
+
+    ## ==================== sharded execution ====================================
+    def pop_monitor_results(self, MID):
+        """
+        take the results of one monitor out of the label dataframes
+        :param MID: monitor id without the 'MNTR|' prefix
+        :return: DataFrame, 'time' + one column '{label name}:{column name}' per label
+        """
+        df_checkpoint = pd.DataFrame({'time': self.df_DC0['time'].values})
+        for label_name, df_label in self.label_frames.items():
+            for column in [MID, str('MNTR|' + MID)]:
+                if column in df_label.columns:
+                    df_checkpoint['{}:{}'.format(label_name, column)] = df_label[column].values
+                    df_label.drop(column, axis=1, inplace=True)
+        return df_checkpoint
+
+    def Sharded_Labelling_Process(self, queue_path, checkpoint_dir, n_shards, worker_id=None, shards=None):
+        """
+        run on each worker node: label the monitors claimed from the shared work queue, with one checkpoint per monitor
+        the same command resumes after a crash, the monitors already checkpointed are not labelled again
+        the whole-fleet csv files are not loaded: each monitor claimed is read with its own columns only
+        (read_monitor_rawdata), so the memory of a worker node does not grow with the fleet
+        :param queue_path: sqlite file of the work queue, shared by all the worker nodes
+        :param checkpoint_dir: directory of the per-monitor checkpoints, shared by all the worker nodes
+        :param n_shards: number of shards of the fleet
+        :param worker_id: name of the worker, default host:pid
+        :param shards: shards of this worker (it takes the other shards once they are finished), None for any shard
+        :return: list of the monitors labelled by this worker
+        """
+        self.check_rawdata_files()
+        MonitorWorkQueue(queue_path).enqueue(self.fimer_list, n_shards=n_shards)
+        return run_worker(labelling=self, queue_path=queue_path, checkpoint_dir=checkpoint_dir,
+                          worker_id=worker_id, shards=shards)
+
+    def Merge_Shard_Results(self, checkpoint_dir):
+        """
+        merge the per-monitor checkpoints in the order of self.fimer_list and save the final results
+        run once after all the shards are finished, it reads the whole-fleet raw data (for the event store)
+        :param checkpoint_dir: directory of the per-monitor checkpoints
+        :return: list of the monitors without checkpoint (failed or not labelled yet)
+        """
+        self.read_all_rawdata()
+        missing_list = []
+        daily_list = []
+        for MID in self.fimer_list:
+            df_checkpoint = read_checkpoint(checkpoint_dir, MID)
+            df_daily = read_checkpoint(checkpoint_dir, MID, name='daily')
+            if df_checkpoint is None or df_daily is None:
+                missing_list.append(MID)
+                continue
+            daily_list.append(df_daily)
+            df_checkpoint = df_checkpoint.set_index('time')
+            for checkpoint_column in df_checkpoint.columns:
+                label_name, column = checkpoint_column.split(':', 1)
+                df_label = self.label_frames[label_name]
+                df_label[column] = df_label['time'].map(df_checkpoint[checkpoint_column]).values
+        if daily_list:
+            self.daily_rollup.upsert(pd.concat(daily_list, ignore_index=True))
+        self.save_results()
+        return missing_list
+
+    def build_event_store(self):
+        """
+        run-length encode the labelling results into a FaultEventStore
+        the peak AC power, AC voltage and DC power are saved for each event
+        :return: FaultEventStore
+        """
+        metric_frames = {'Gen.W': self.df_ac_power, 'Inv.AC.U.V': self.df_ac_voltage, 'Inv.DC.P.W': self.df_dc_power}
+        monitor_sites = self.df_monitors.set_index('source')['siteId'].to_dict()
+
+        event_store = FaultEventStore(monitor_sites=monitor_sites)
+        for label_name, df_label in self.label_frames.items():
+            # the results use either the full 'MNTR|...' name or the bare monitor id as column name
+            df_label = df_label.rename(columns=lambda column: column if column == 'time' or column.startswith('MNTR|')
+                                       else str('MNTR|' + column))
+            event_store.add_label_frame(label_name=label_name, df_label=df_label, metric_frames=metric_frames)
+        return event_store
+
+    def Threshold_Sweep(self, threshold_grid, reference_labels=None, diff_name='AC', metric_name='Gen.W'):
+        """
+        evaluate a grid of threshold configurations in one pass over the preprocessed data
+        :param threshold_grid: dict {threshold name: list of values} or DataFrame of configurations,
+                               see threshold_sweep.sweep_threshold_names
+        :param reference_labels: dict {label name: wide labelling result ('time' + one column per monitor)}
+        :param diff_name: 'AC' | 'DC'
+        :param metric_name: 'Gen.W' | 'Inv.DC.P.W'
+        :return: DataFrame, one row per configuration with the label counts and the agreement with the reference
+        """
+        df_grid = build_threshold_grid(threshold_grid=threshold_grid,
+                                       default_thresholds={'ac_overvoltage_threshold': ac_overvoltage_threshold,
+                                                           'ac_blackout_vol_threshold': ac_blackout_vol_threshold,
+                                                           'acvoltage_volt_watt_threshold': acvoltage_volt_watt_threshold,
+                                                           'acvoltage_volt_var_threshold': acvoltage_volt_var_threshold})
+        if reference_labels is None:
+            reference_labels = {}
+        unknown = set(reference_labels) - set(sweep_label_names)
+        if unknown:
+            raise ValueError('unknown label(s) in the reference: {}'.format(sorted(unknown)))
+        label_counts = {label_name: np.zeros(len(df_grid), dtype=int) for label_name in sweep_label_names}
+        confusion = {label_name: np.zeros((len(df_grid), 4), dtype=int) for label_name in reference_labels}
+
+        self.read_all_rawdata()
+        for MID in self.fimer_list:
+            MID_full = str('MNTR|' + MID)
+            df, site_id, pv_size, _ = self.prepare_monitor(MID=MID)
+            df['{}_Pdiff'.format(diff_name)] = df[metric_name].diff() / pv_size
+            labels = sweep_monitor(df=df, df_grid=df_grid, diff_name=diff_name, metric_name=metric_name)
+            for label_name, label in labels.items():
+                label_counts[label_name] += label.sum(axis=0)
+            for label_name, df_reference in reference_labels.items():
+                reference = align_reference(df=df, df_reference=df_reference, MID_full=MID_full)
+                if reference is None:
+                    continue
+                reference = reference[:, np.newaxis]
+                label = labels[label_name]
+                confusion[label_name] += np.stack([(label & reference).sum(axis=0),
+                                                   (label & ~reference).sum(axis=0),
+                                                   (~label & reference).sum(axis=0),
+                                                   (~label & ~reference).sum(axis=0)], axis=1)
+
+        return summarise_sweep(df_grid=df_grid, label_counts=label_counts, confusion=confusion)
+
+
+if __name__ == '__main__':
+    time_start = '2022-09-06'
+    time_end = '2023-04-30'
+    df_sites = pd.read_csv('../input_data/SITE_nodeType_20230321.csv')
+    df_monitors = pd.read_csv('../input_data/MNTR_ddb_20230419.csv')
+    fimer_labelling = FIMER_DCAC_Labelling(time_start, time_end, df_monitors, df_sites)
+
+    fimer_labelling.Labelling_Process()
+
+    # # sharded execution: run on each worker node (the same command resumes after a crash), then merge once, e.g.,
+    # fimer_labelling.Sharded_Labelling_Process(queue_path='../preprocessed_data/labelling_queue.sqlite',
+    #                                           checkpoint_dir='results/checkpoints', n_shards=8, shards=[0, 1])
+    # missing_list = fimer_labelling.Merge_Shard_Results(checkpoint_dir='results/checkpoints')
+
+    # # calibrate the clipping rules in one pass, e.g.,
+    # df_sweep = fimer_labelling.Threshold_Sweep(
+    #     threshold_grid={'acvoltage_volt_var_threshold': np.arange(244, 254),
+    #                     'threshold_clipp_time': [6, 9, 12, 18, 24]},
+    #     reference_labels={'inverter_clipping': pd.read_csv('results/df_inverter_clipping.csv', index_col=0)})
+    # df_sweep.to_csv('results/threshold_sweep.csv')
@@ -21,6 +21,7 @@ class ClearSkyDay():
         get_ghi_data : fetch the generation of the clear-sky model
         get_expected_data : fetch the expected generation of a PV site based on the weather data from the BOM dataset
         detect_clear_sky_day : Check whether a certain day is a clear sky day or not.
+        identify_clearsky_days : clear-sky days of all the sites at once
     """
     def __init__(self, threshold_low_cloudiness, clearsky_data_path, expected_data_path,
                  site_id, time_start, time_end):
@@ -55,11 +56,20 @@ class ClearSkyDay():
 
         return df_cloudiness
 
-    def identify_clearsky_day(self):
+    def identify_clearsky_days(self):
+        '''
+        :return: DataFrame, 'date' + one column per site, True / False, NaN if the cloudiness is unknown
+        '''
         df_site_clearsky, df_site_expected = self.read_raw_data()
         df_cloudiness = self.calculate_cloudiness(df_site_clearsky=df_site_clearsky,
                                                   df_site_expected=df_site_expected)
-        df_cloudiness.iloc[:, 1:] = df_cloudiness.iloc[:, 1:].ge(self.threshold_low_cloudiness)
+        site_columns = df_cloudiness.columns[1:]
+        df_ratio = df_cloudiness[site_columns]
+        df_cloudiness[site_columns] = df_ratio.ge(self.threshold_low_cloudiness).where(df_ratio.notna())
+        return df_cloudiness
+
+    def identify_clearsky_day(self):
+        df_cloudiness = self.identify_clearsky_days()
         clearsky_date_list = df_cloudiness.loc[df_cloudiness[self.siteid] == True, 'date'].values.tolist()
         return clearsky_date_list
 
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+Daily rollup of the 5-minute data and labels, built in the same pass as the labelling
+One row per (monitor, date): daily energy, missing samples, max AC voltage and minutes of each fault label
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import pandas as pd
+import numpy as np
+
+##========== Global Parameter ====================
+sample_minute = 5
+key_columns = ['monitor', 'date']
+
+
+# ======================================================================================
+# = Daily rollup of one monitor
+# ======================================================================================
+def build_daily_rollup(df_raw, df_labelled, monitor, label_names):
+    """
+    :param df_raw: 5-minute data of one monitor over the whole period (before the clear-sky & daytime selection),
+                   'clear_sky_day' flags the samples of the clear-sky days
+    :param df_labelled: 5-minute data of the same monitor after labelling (clear-sky days with enough samples only)
+    :param monitor: monitor name, e.g., 'MNTR|...'
+    :param label_names: label columns of df_labelled to be counted
+    :return: DataFrame, one row per date
+    """
+    energy_factor = sample_minute / 60  # W -> Wh for one sample
+    group = df_raw.groupby('date')
+    df_daily = pd.DataFrame({'ac_energy_Wh': group['Gen.W'].sum() * energy_factor,
+                             'dc_energy_Wh': group['Inv.DC.P.W'].sum() * energy_factor,
+                             'theoretical_energy_Wh': group['theoretical_P.W'].sum() * energy_factor,
+                             'missing_samples': group['Gen.W'].apply(lambda x: x.isna().sum()),
+                             'missing_samples_dc': group['DC Current'].apply(lambda x: x.isna().sum()),
+                             'max_ac_voltage_V': group['Inv.AC.U.V'].max(),
+                             'clear_sky_day': group['clear_sky_day'].any()})
+
+    # fault minutes, only the clear-sky days with enough samples are labelled (NaN for the others)
+    label_names = [label_name for label_name in label_names if label_name in df_labelled.columns]
+    df_minute = df_labelled.groupby('date')[label_names].sum() * sample_minute
+    df_minute.columns = ['{}_minutes'.format(label_name) for label_name in label_names]
+    df_minute['fault_minutes'] = df_labelled[label_names].any(axis=1).groupby(df_labelled['date']).sum() * \
+                                 sample_minute
+    df_daily = df_daily.join(df_minute)
+
+    df_daily.index = pd.to_datetime(df_daily.index.astype(str))
+    df_daily.index.name = 'date'
+    df_daily = df_daily.reset_index()
+    df_daily.insert(0, 'monitor', monitor)
+    return df_daily
+
+
+# ======================================================================================
+# = Rollup table
+# ======================================================================================
+class DailyRollupTable():
+    """
+    daily rollup of all monitors, kept sorted by (monitor, date) with the row range of each monitor
+    the values are float, clear_sky_day is 1/0
+
+    Method:
+        upsert : merge new rows, the rows with the same (monitor, date) are updated column by column
+        query : rows of some monitors and a date range
+        save / load : columnar on-disk format (compressed numpy archive, one array per column)
+    """
+    def __init__(self, df_rollup=None):
+        if df_rollup is None:
+            df_rollup = pd.DataFrame({'monitor': pd.Series(dtype=object), 'date': pd.Series(dtype='datetime64[ns]')})
+        self.set_rollup(df_rollup)
+
+    def set_rollup(self, df_rollup):
+        self.df_rollup = df_rollup.sort_values(key_columns, kind='mergesort')
+        self.df_rollup.index = np.arange(len(self.df_rollup))
+        self._date = self.df_rollup['date'].values.astype('datetime64[ns]')
+        # row range [start, end) of each monitor, the rows being sorted by monitor
+        monitor_names, monitor_start = np.unique(self.df_rollup['monitor'].values.astype(str), return_index=True)
+        monitor_end = np.append(monitor_start[1:], len(self.df_rollup))
+        self._monitor_rows = {monitor: (start, end) for monitor, start, end in
+                              zip(monitor_names, monitor_start, monitor_end)}
+
+    def upsert(self, df_new):
+        """
+        :param df_new: rows to merge, with the 'monitor' and 'date' columns
+        """
+        if len(df_new) == 0:
+            return
+        df_new = df_new.copy()
+        df_new['date'] = pd.to_datetime(df_new['date'])
+        # all the values are kept as float (booleans as 1/0, missing as NaN)
+        df_new = df_new.drop_duplicates(key_columns, keep='last').set_index(key_columns).astype(float)
+        df_all = self.df_rollup.set_index(key_columns)
+        df_all = df_all.reindex(df_all.index.union(df_new.index))
+        for column in df_new.columns:
+            if column not in df_all.columns:
+                df_all[column] = np.nan
+        df_all.loc[df_new.index, df_new.columns] = df_new.values
+        self.set_rollup(df_all.reset_index())
+
+    def query(self, monitors=None, date_start=None, date_end=None, columns=None):
+        """
+        :param monitors: monitor or list of monitors, None for all
+        :param date_start: first date (included)
+        :param date_end: last date (included)
+        :param columns: columns to return, None for all
+        :return: DataFrame
+        """
+        date_start = pd.Timestamp(date_start).to_datetime64() if date_start is not None else None
+        date_end = pd.Timestamp(date_end).to_datetime64() if date_end is not None else None
+        if monitors is None:
+            mask = np.ones(len(self._date), dtype=bool)
+            if date_start is not None:
+                mask &= self._date >= date_start
+            if date_end is not None:
+                mask &= self._date <= date_end
+            positions = np.nonzero(mask)[0]
+        else:
+            positions = []
+            for monitor in np.atleast_1d(monitors):
+                if monitor not in self._monitor_rows:
+                    continue
+                # the dates of one monitor are sorted
+                start, end = self._monitor_rows[monitor]
+                lo = start if date_start is None else start + np.searchsorted(self._date[start:end], date_start, 'left')
+                hi = end if date_end is None else start + np.searchsorted(self._date[start:end], date_end, 'right')
+                positions.append(np.arange(lo, hi))
+            positions = np.concatenate(positions) if positions else np.array([], dtype=int)
+        df_query = self.df_rollup.iloc[positions]
+        if columns is not None:
+            df_query = df_query[key_columns + [column for column in columns if column not in key_columns]]
+        return df_query
+
+    def save(self, path):
+        monitor_codes, monitor_names = pd.factorize(self.df_rollup['monitor'])
+        value_columns = [column for column in self.df_rollup.columns if column not in key_columns]
+        arrays = {'monitor_code': monitor_codes.astype(np.int32),
+                  'monitor_names': np.array(monitor_names, dtype=str),
+                  'date': self._date.astype('datetime64[D]').view(np.int64).astype(np.int32),
+                  'value_columns': np.array(value_columns, dtype=str)}
+        for c, column in enumerate(value_columns):
+            arrays['column_{}'.format(c)] = self.df_rollup[column].values.astype(np.float32)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            df_rollup = pd.DataFrame({'monitor': arrays['monitor_names'][arrays['monitor_code']].astype(object),
+                                      'date': arrays['date'].astype(np.int64).view('datetime64[D]')
+                                      .astype('datetime64[ns]')})
+            for c, column in enumerate(arrays['value_columns'].tolist()):
+                df_rollup[column] = arrays['column_{}'.format(c)].astype(float)
+        return cls(df_rollup)
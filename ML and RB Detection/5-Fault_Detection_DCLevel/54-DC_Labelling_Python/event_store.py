@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+Store the labelling results as fault events instead of dense 5-minute boolean columns
+Each consecutive run of True values of one label on one monitor becomes an event:
+(monitor, label, start, end, duration, peak metrics)
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import pandas as pd
+import numpy as np
+
+##========== Global Parameter ====================
+time_resolution = pd.Timedelta(minutes=5)
+
+
+# ======================================================================================
+# = Run-length encoding of the wide labelling results
+# ======================================================================================
+def encode_label_frame(df_label, metric_frames=None):
+    """
+    run-length encode a wide labelling result into events
+    :param df_label: 'time' + one boolean column per monitor, e.g., results/df_inverter_clipping.csv
+    :param metric_frames: dict {metric name: wide dataframe ('time' + one column per monitor)},
+                          the maximum of each metric during an event is saved as '{metric name}_max'
+    :return: DataFrame with columns monitor, start, end, plus the peak metrics
+    """
+    time_index = pd.to_datetime(df_label['time']).values
+    monitor_list = [column for column in df_label.columns if column != 'time']
+    df_mask = df_label[monitor_list].fillna(False).astype(bool)
+    n_time = len(df_mask)
+
+    # the runs start where the label switches from False to True, and end where it switches back
+    padded = np.zeros((n_time + 2, len(monitor_list)), dtype=np.int8)
+    padded[1:-1] = df_mask.values
+    change = np.diff(padded, axis=0).T  # monitor x time, so that the events are ordered by monitor
+    monitor_idx, start_idx = np.nonzero(change == 1)
+    _, end_idx = np.nonzero(change == -1)
+
+    df_events = pd.DataFrame({'monitor': np.array(monitor_list, dtype=object)[monitor_idx],
+                              'start': time_index[start_idx],
+                              'end': time_index[end_idx - 1] + time_resolution.to_timedelta64()})
+
+    if metric_frames is None:
+        metric_frames = {}
+    for metric_name, df_metric in metric_frames.items():
+        df_metric = df_metric.set_index(pd.to_datetime(df_metric['time'])).drop('time', axis=1)
+        values = df_metric.reindex(index=time_index, columns=monitor_list).values.astype(float)
+        # flatten monitor by monitor and take the max over [start, end) of each event in one call
+        flat = np.append(values.ravel(order='F'), np.nan)
+        bounds = np.stack([monitor_idx * n_time + start_idx, monitor_idx * n_time + end_idx], axis=1).ravel()
+        if len(bounds):
+            with np.errstate(invalid='ignore'):
+                peak = np.fmax.reduceat(flat, bounds)[::2]
+        else:
+            peak = np.array([], dtype=float)
+        df_events['{}_max'.format(metric_name)] = peak
+    return df_events
+
+
+# ======================================================================================
+# = Event store
+# ======================================================================================
+class FaultEventStore():
+    """
+    fault events with a time index and a per-monitor index
+
+    Method:
+        add_label_frame : run-length encode a wide labelling result and add its events
+        query : events overlapping a time range, filtered by monitor, site, label and duration
+        monitors : monitors having at least one event matching the query
+        save / load : compact on-disk format (compressed numpy archive)
+    """
+    def __init__(self, monitor_sites=None):
+        '''
+        :param monitor_sites: dict {monitor: site id}, used to query the events of a site
+        '''
+        self.monitor_sites = dict(monitor_sites) if monitor_sites is not None else {}
+        self.metric_names = []
+        self.df_events = pd.DataFrame({'monitor': pd.Series(dtype=object), 'label': pd.Series(dtype=object),
+                                       'start': pd.Series(dtype='datetime64[ns]'),
+                                       'end': pd.Series(dtype='datetime64[ns]')})
+        self.build_index()
+
+    def add_label_frame(self, label_name, df_label, metric_frames=None):
+        df_new = encode_label_frame(df_label=df_label, metric_frames=metric_frames)
+        df_new.insert(1, 'label', label_name)
+        # replace the previous events of the same label & monitors
+        monitor_list = [column for column in df_label.columns if column != 'time']
+        keep = ~((self.df_events['label'] == label_name) & self.df_events['monitor'].isin(monitor_list))
+        self.df_events = pd.concat([self.df_events[keep], df_new], ignore_index=True)
+        for metric_name in metric_frames or {}:
+            if metric_name not in self.metric_names:
+                self.metric_names.append(metric_name)
+        self.build_index()
+
+    def build_index(self):
+        """
+        sort the events by start time and build the interval index
+        for events sorted by start, the running max of the end time gives the first event
+        that can overlap a time range, so a range query is two binary searches plus a scan of the candidates
+        """
+        self.df_events = self.df_events.sort_values(['start', 'monitor', 'label'], kind='mergesort')
+        self.df_events.index = np.arange(len(self.df_events))
+        self.df_events['duration_minute'] = (self.df_events['end'] - self.df_events['start']).dt.total_seconds() / 60
+
+        self._start = self.df_events['start'].values.astype('datetime64[ns]').view(np.int64)
+        self._end = self.df_events['end'].values.astype('datetime64[ns]').view(np.int64)
+        self._end_cummax = np.maximum.accumulate(self._end) if len(self._end) else self._end
+        self._label = self.df_events['label'].values
+        self._duration = self.df_events['duration_minute'].values
+
+        # per-monitor index: positions (sorted by start) and the same interval index on each monitor
+        self._monitor_index = {}
+        for monitor, positions in self.df_events.groupby('monitor').indices.items():
+            positions = np.sort(positions)
+            self._monitor_index[monitor] = (positions, self._start[positions],
+                                            np.maximum.accumulate(self._end[positions]))
+
+    @staticmethod
+    def _overlap(positions, start, end_cummax, end, time_start, time_end):
+        # candidates: start < time_end and running max of end > time_start
+        hi = np.searchsorted(start, time_end, side='left') if time_end is not None else len(start)
+        lo = np.searchsorted(end_cummax, time_start, side='right') if time_start is not None else 0
+        candidates = positions[lo:hi]
+        if time_start is not None:
+            candidates = candidates[end[candidates] > time_start]
+        return candidates
+
+    def query(self, time_start=None, time_end=None, monitors=None, sites=None, labels=None, min_duration=None):
+        """
+        events overlapping [time_start, time_end)
+        :param time_start: str or timestamp, None for no lower bound
+        :param time_end: str or timestamp, None for no upper bound
+        :param monitors: monitor or list of monitors
+        :param sites: site id or list of site ids (needs monitor_sites)
+        :param labels: label name or list of label names
+        :param min_duration: minimum duration of the events (minute)
+        :return: DataFrame of the matched events, ordered by start time
+        """
+        time_start = pd.Timestamp(time_start).value if time_start is not None else None
+        time_end = pd.Timestamp(time_end).value if time_end is not None else None
+
+        if sites is not None:
+            sites = set(np.atleast_1d(sites))
+            site_monitors = [monitor for monitor, site_id in self.monitor_sites.items() if site_id in sites]
+            monitors = site_monitors if monitors is None else \
+                [monitor for monitor in np.atleast_1d(monitors) if monitor in site_monitors]
+
+        if monitors is None:
+            positions = self._overlap(np.arange(len(self._start)), self._start, self._end_cummax, self._end,
+                                      time_start, time_end)
+        else:
+            positions = [self._overlap(self._monitor_index[monitor][0], self._monitor_index[monitor][1],
+                                       self._monitor_index[monitor][2], self._end, time_start, time_end)
+                         for monitor in np.atleast_1d(monitors) if monitor in self._monitor_index]
+            positions = np.sort(np.concatenate(positions)) if positions else np.array([], dtype=int)
+
+        if labels is not None:
+            positions = positions[np.isin(self._label[positions], np.atleast_1d(labels))]
+        if min_duration is not None:
+            positions = positions[self._duration[positions] >= min_duration]
+        return self.df_events.iloc[positions]
+
+    def monitors(self, **query_kwargs):
+        return self.query(**query_kwargs)['monitor'].unique().tolist()
+
+    def save(self, path):
+        """
+        save the events with categorical codes for monitor & label, int64 times and float32 metrics
+        :param path: .npz file
+        """
+        monitor_codes, monitor_names = pd.factorize(self.df_events['monitor'])
+        label_codes, label_names = pd.factorize(self.df_events['label'])
+        arrays = {'monitor_code': monitor_codes.astype(np.int32),
+                  'label_code': label_codes.astype(np.int16),
+                  'monitor_names': np.array(monitor_names, dtype=str),
+                  'label_names': np.array(label_names, dtype=str),
+                  'start': self._start, 'end': self._end,
+                  'metric_names': np.array(self.metric_names, dtype=str),
+                  'site_monitors': np.array(list(self.monitor_sites.keys()), dtype=str),
+                  'site_ids': np.array(list(self.monitor_sites.values()), dtype=str)}
+        for m, metric_name in enumerate(self.metric_names):
+            arrays['metric_{}'.format(m)] = self.df_events['{}_max'.format(metric_name)].values.astype(np.float32)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            store = cls(monitor_sites=dict(zip(arrays['site_monitors'].tolist(), arrays['site_ids'].tolist())))
+            store.metric_names = arrays['metric_names'].tolist()
+            df_events = pd.DataFrame({'monitor': arrays['monitor_names'][arrays['monitor_code']].astype(object),
+                                      'label': arrays['label_names'][arrays['label_code']].astype(object),
+                                      'start': arrays['start'].view('datetime64[ns]'),
+                                      'end': arrays['end'].view('datetime64[ns]')})
+            for m, metric_name in enumerate(store.metric_names):
+                df_events['{}_max'.format(metric_name)] = arrays['metric_{}'.format(m)].astype(float)
+        store.df_events = df_events
+        store.build_index()
+        return store
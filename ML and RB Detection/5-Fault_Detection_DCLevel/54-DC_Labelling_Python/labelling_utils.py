@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+Array helpers shared by the labelling modules (threshold_sweep.py, string_fault.py)
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import numpy as np
+
+
+# ======================================================================================
+# = Consecutive periods
+# ======================================================================================
+def run_length_duration(mask):
+    """
+    for each True cell, the length of the consecutive True period (along the time axis) it belongs to
+    the same as df.groupby(df[col].diff().ne(0).cumsum())[col].transform('sum') for each column
+    :param mask: boolean array (time x column)
+    :return: int array (time x column), zero for the False cells
+    """
+    n_time, n_column = mask.shape
+    if n_time == 0:
+        return np.zeros(mask.shape, dtype=int)
+    # a new period starts at the first time slot and whenever the value changes
+    period_start = np.ones(mask.shape, dtype=bool)
+    period_start[1:] = mask[1:] != mask[:-1]
+    # flatten column by column so that the periods of different columns never merge
+    period_id = np.cumsum(period_start.ravel(order='F')) - 1
+    period_sum = np.bincount(period_id, weights=mask.ravel(order='F'))
+    return period_sum[period_id].astype(int).reshape(mask.shape, order='F')
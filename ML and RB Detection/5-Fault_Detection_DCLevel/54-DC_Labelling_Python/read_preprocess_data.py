@@ -11,6 +11,83 @@ import numpy as np
 from pvlib import irradiance
 from pvlib import location
 
+##========== Global Parameter ====================
+PROD_AWS_PROFILE = "gsesami-prod"
+AWS_REGION = "ap-southeast-2"
+prod_client = None
+
+
+# ======================================================================================
+# = read the raw data from the AWS database (same as 2A_labelling_monitor.ipynb)
+# ======================================================================================
+def get_prod_client():
+    """
+    timestream client of the production database, created at the first query
+    (boto3 and the AWS credentials are only needed when the data is fetched from the database)
+    """
+    global prod_client
+    if prod_client is None:
+        import boto3
+        prod_session = boto3.session.Session(profile_name=PROD_AWS_PROFILE)
+        prod_client = prod_session.client("timestream-query", region_name=AWS_REGION)
+    return prod_client
+
+
+def read_metric(time_start, time_end, measure_name, MID):
+    """
+    read raw data from the AWS database
+    :param time_start: time start, e.g., '2022-10-02'
+    :param time_end: time end, e.g., '2023-04-05'
+    :param measure_name: measurement metric, e.g.,'Gen.W'
+    :param MID: monitor id
+    :return: time list, value list
+    """
+    timeid = []
+    data_values = []
+    ##----------------- read the Performance  --------------##
+    query = """SELECT time, measure_value::bigint
+                    FROM "DiagnoProd"."DiagnoProd"
+                    WHERE measure_name = '""" + measure_name + """'
+                    AND MID = '""" + MID + """'
+                    AND time BETWEEN '""" + time_start + """'
+                    AND '""" + time_end + """' """
+
+    paginator = get_prod_client().get_paginator("query")
+    page_iterator = paginator.paginate(QueryString=query,)
+    i = 1
+    for page in page_iterator:
+        try:
+            timeid_page = [f[0]['ScalarValue'] for f in pd.DataFrame(page["Rows"])['Data']]
+            data_values_page = [f[1]['ScalarValue'] for f in pd.DataFrame(page["Rows"])['Data']]
+            timeid = timeid + timeid_page
+            data_values = data_values + data_values_page
+        except KeyError:
+            print('Page {%d} has no data available:' % i)
+        i = i + 1
+    return timeid, data_values
+
+
+def build_dataframe(timeid, measure_name, data_values, timezone_value):
+    """
+    change the time zone
+    :param timeid: time read from the AWS
+    :param measure_name: measurement metric, e.g.,'Gen.W'
+    :param data_values: value read from the AWS
+    :param timezone_value: time zone
+    :return: DataFrame, 'time' + measure_name, sorted by time
+    """
+    timeid = pd.to_datetime(timeid)
+    if timeid.tzinfo is None:
+        if timezone_value is not None:
+            timeid = timeid.tz_localize('UTC').tz_convert(timezone_value)
+        else:
+            print('no timezone in the table')
+            timeid = timeid.tz_localize('UTC').tz_convert('Australia/Sydney')
+    data = pd.DataFrame(data={'time': timeid, measure_name: data_values})
+    data.sort_values('time', inplace=True)
+    data[measure_name] = data[measure_name].astype(float)
+    return data
+
 
 # ======================================================================================
 # = calculate the sunrise and sunset time based on the latitude and longitude
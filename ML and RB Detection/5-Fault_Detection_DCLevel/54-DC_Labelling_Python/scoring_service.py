@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+Batch scoring of the recurring-fault models trained in
+43-1-Recurring_Binary_ML.ipynb, 43-2-Recurring_Binary_NN.ipynb and 43-4-Level1_Multiclass.ipynb
+- the daily samples are built for all monitors & days in one pass when the service starts, in the format the model
+  was trained on (feature_spec): 43-0-Generate_Dailysamples.ipynb (96 15-minute values of the whole day) for 43-1 and
+  43-2, or 192 5-minute values of 5 am - 9 pm for 43-4, normalised with the mean & standard deviation of the
+  non-zero generation of the monitor
+- 43-1 and 43-2 are trained on the clear-sky days (ClearSky != False), their other days are not scored by default;
+  43-4 is trained on all the days (clearsky_only in feature_spec)
+- the model is loaded once and kept warm, the same scorer serves the library API and a local HTTP endpoint
+- the HTTP requests are grouped in micro-batches before calling the model
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import json
+import time
+import queue
+import pickle
+import warnings
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import numpy as np
+from clearsky_day import ClearSkyDay
+
+##========== Global Parameter ====================
+# same as 43-0-Generate_Dailysamples.ipynb & 43-4-Level1_Multiclass.ipynb
+effective_start_time = 5
+effective_end_time = 20
+outlier_factor = 1.2  # generation larger than 1.2 * PV size is an outlier
+threshold_low_cloudiness = 0.8
+
+# format of the daily samples of each model
+# resolution: time resolution of the values; hour_start, hour_end: hours kept in the sample (included)
+# night_zero: the generation out of effective_start_time - effective_end_time is set to zero
+# clearsky_only: the model is trained on the clear-sky days only, the other days are not scored by default
+feature_spec_15min = {'resolution': '15min', 'hour_start': 0, 'hour_end': 23, 'night_zero': True,
+                      'clearsky_only': True}  # 43-1, 43-2
+feature_spec_5min_daytime = {'resolution': '5min', 'hour_start': effective_start_time,
+                             'hour_end': effective_end_time, 'night_zero': False, 'clearsky_only': False}  # 43-4
+
+
+def feature_columns(feature_spec):
+    """
+    :return: names of the time slots of the daily sample, e.g., ['00:00:00', '00:15:00', ...] ('hour_min' in 43-0)
+    """
+    time_slots = pd.date_range('2023-06-21', periods=pd.Timedelta(days=1) // pd.Timedelta(feature_spec['resolution']),
+                               freq=feature_spec['resolution'])
+    time_slots = time_slots[(time_slots.hour >= feature_spec['hour_start']) &
+                            (time_slots.hour <= feature_spec['hour_end'])]
+    return time_slots.strftime('%H:%M:%S').tolist()
+
+
+# ======================================================================================
+# = Daily samples for many monitors
+# ======================================================================================
+def read_power_store(data_path, monitor_list=None, time_start=None, time_end=None):
+    """
+    read the 5-minute AC power of some monitors from the wide csv ('time' + one column per monitor)
+    :param monitor_list: monitors to read ('MNTR|...'), None for all
+    :return: DataFrame indexed by time, one float32 column per monitor
+    """
+    column_list = pd.read_csv(data_path, nrows=0).columns
+    if monitor_list is None:
+        monitor_list = [column for column in column_list if column.startswith('MNTR|')]
+    else:
+        monitor_list = [MID_full for MID_full in monitor_list if MID_full in column_list]
+    df_power = pd.read_csv(data_path, usecols=['time'] + monitor_list,
+                           dtype={MID_full: np.float32 for MID_full in monitor_list})
+    df_power['time'] = pd.to_datetime(df_power['time'])
+    if time_start is not None:
+        df_power = df_power[df_power['time'] >= time_start]
+    if time_end is not None:
+        df_power = df_power[df_power['time'] < time_end]
+    return df_power.set_index('time')
+
+
+def build_daily_samples(df_power, pv_size, feature_spec=feature_spec_15min):
+    """
+    daily samples of all the monitors, the vectorised version of preprocess_data & create_single_sample (43-0),
+    or of preprocess_missingdata & calculate_mean_variance (43-4)
+    :param df_power: 5-minute (or 15-minute) AC power indexed by time, one column per monitor
+    :param pv_size: Series {monitor: PV size (W)}
+    :param feature_spec: format of the daily samples, feature_spec_15min | feature_spec_5min_daytime
+    :return: DataFrame with 'MID', 'date', the normalised values of the time slots, 'Mean_value', 'Std_value',
+             'Max_value'
+    """
+    time_slots = feature_columns(feature_spec)
+    n_slot = len(time_slots)
+    if df_power.shape[0] == 0 or df_power.shape[1] == 0:
+        return pd.DataFrame(columns=['MID', 'date'] + time_slots + ['Mean_value', 'Std_value', 'Max_value'])
+    resolution = feature_spec['resolution']
+    df_slot = df_power.resample(resolution).mean()
+    df_slot = df_slot.reindex(pd.date_range(df_slot.index[0].normalize(),
+                                            df_slot.index[-1].normalize() + pd.Timedelta(days=1),
+                                            freq=resolution, inclusive='left'))
+    # the hours out of the sample are dropped before filling the missing data (43-4)
+    hour = df_slot.index.hour
+    df_slot = df_slot[(hour >= feature_spec['hour_start']) & (hour <= feature_spec['hour_end'])]
+    monitor_list = df_slot.columns.tolist()
+    pv_size = pv_size.reindex(monitor_list).astype(float).values
+
+    # replace the negative values with zero & the outliers with nan, then fill the missing data
+    df_slot = df_slot.clip(lower=0)
+    df_slot = df_slot.mask(df_slot > outlier_factor * pv_size)
+    df_slot = df_slot.ffill().bfill().fillna(0)
+    # night time should be zero (43-0)
+    if feature_spec['night_zero']:
+        hour = df_slot.index.hour
+        df_slot.loc[(hour < effective_start_time) | (hour > effective_end_time)] = 0
+
+    # mean and standard deviation excluding zero values
+    values = df_slot.values
+    nonzero = np.where(values != 0, values, np.nan)
+    with warnings.catch_warnings():
+        # monitors without generation, removed below
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean_value = np.nanmean(nonzero, axis=0)
+        std_value = np.nanstd(nonzero, axis=0)
+    max_value = values.max(axis=0)
+
+    # (day x time slot x monitor) -> one row per (monitor, day)
+    n_day = len(values) // n_slot
+    with np.errstate(invalid='ignore', divide='ignore'):
+        power_norm = ((values - mean_value) / std_value).reshape(n_day, n_slot, len(monitor_list))
+    power_norm = power_norm.transpose(2, 0, 1).reshape(-1, n_slot)
+
+    df_samples = pd.DataFrame(power_norm.astype(np.float32), columns=time_slots)
+    df_samples.insert(0, 'MID', np.repeat(monitor_list, n_day))
+    df_samples.insert(1, 'date', np.tile(df_slot.index[::n_slot].strftime('%Y-%m-%d'), len(monitor_list)))
+    df_samples['Mean_value'] = np.repeat(mean_value, n_day)
+    df_samples['Std_value'] = np.repeat(std_value, n_day)
+    df_samples['Max_value'] = np.repeat(max_value, n_day)
+    # monitors without generation cannot be normalised
+    df_samples = df_samples[np.isfinite(df_samples['Std_value']) & (df_samples['Std_value'] > 0)]
+    df_samples.index = np.arange(len(df_samples))
+    return df_samples
+
+
+class DailyFeatureStore():
+    """
+    daily samples of all the monitors, built once from the 5-minute data and kept in memory
+
+    Method:
+        load : read the 5-minute data and build the daily samples of all monitors, the new samples replace the
+               previous ones at once, so load can be called again (e.g., every morning) while lookups are running
+        lookup : samples of some monitors / sites and a date range
+    """
+    def __init__(self, data_paths, df_monitors, feature_spec=feature_spec_15min, clearsky_data_path=None,
+                 expected_data_path=None):
+        '''
+        :param data_paths: wide power csv files, e.g., the 5-minute and the 15-minute raw data
+        :param feature_spec: format of the daily samples of the model
+        :param clearsky_data_path: daily clear-sky generation of the sites, None if the clear-sky days are unknown
+        :param expected_data_path: daily expected generation of the sites
+        '''
+        self.data_paths = [data_paths] if isinstance(data_paths, str) else list(data_paths)
+        self.df_monitors = df_monitors.drop_duplicates(subset='source').set_index('source')
+        self.feature_spec = feature_spec
+        self.clearsky_data_path = clearsky_data_path
+        self.expected_data_path = expected_data_path
+        self.load_lock = threading.Lock()
+        # (samples, row range of each monitor, date of each row, clear-sky flag of each row), replaced in one step
+        self._state = (build_daily_samples(pd.DataFrame(), pv_size=pd.Series(dtype=float), feature_spec=feature_spec),
+                       {}, np.array([], dtype=str), np.array([], dtype=float))
+
+    @property
+    def df_samples(self):
+        return self._state[0]
+
+    def clearsky_flags(self, df_samples):
+        """
+        :return: clear-sky flag of each sample, 1 / 0, NaN if unknown (the site or the date is not in the clear-sky data)
+        """
+        if self.clearsky_data_path is None or len(df_samples) == 0:
+            return np.full(len(df_samples), np.nan)
+        date_end = (pd.to_datetime(df_samples['date'].max()) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        select_clearsky_days = ClearSkyDay(threshold_low_cloudiness=threshold_low_cloudiness,
+                                           clearsky_data_path=self.clearsky_data_path,
+                                           expected_data_path=self.expected_data_path,
+                                           site_id=None, time_start=df_samples['date'].min(), time_end=date_end)
+        clearsky = select_clearsky_days.identify_clearsky_days().set_index('date').astype(float).stack()
+        site_list = self.df_monitors['siteId'].reindex(df_samples['MID'].values).values
+        return clearsky.reindex(pd.MultiIndex.from_arrays([df_samples['date'].values, site_list])).values
+
+    def load(self, time_start=None, time_end=None):
+        with self.load_lock:
+            resolution = self.feature_spec['resolution']
+            power_list = [read_power_store(data_path, monitor_list=self.df_monitors.index.tolist(),
+                                           time_start=time_start, time_end=time_end).resample(resolution).mean()
+                          for data_path in self.data_paths]
+            df_power = pd.concat(power_list, axis=1)
+            df_power = df_power.loc[:, ~df_power.columns.duplicated()]
+            df_samples = build_daily_samples(df_power=df_power, pv_size=self.df_monitors['pvSizeWatt'],
+                                             feature_spec=self.feature_spec)
+            clearsky = self.clearsky_flags(df_samples).astype(float)
+            df_samples['ClearSky'] = pd.Series(clearsky).map({1.0: True, 0.0: False}).values
+            # row range [start, end) of each monitor, the samples being grouped by monitor
+            monitor_names, monitor_start = np.unique(df_samples['MID'].values.astype(str), return_index=True)
+            order = np.argsort(monitor_start)
+            monitor_end = np.empty_like(monitor_start)
+            monitor_end[order] = np.append(monitor_start[order][1:], len(df_samples))
+            monitor_rows = {MID_full: (start, end) for MID_full, start, end in
+                            zip(monitor_names, monitor_start, monitor_end)}
+            self._state = (df_samples, monitor_rows, df_samples['date'].values.astype(str), clearsky)
+
+    def lookup(self, monitors=None, sites=None, date_start=None, date_end=None, clearsky_only=None):
+        """
+        :param monitors: monitor or list of monitors ('MNTR|...')
+        :param sites: site id or list of site ids, with monitors: the monitors of these sites only
+        :param date_start: first date (included), 'YYYY-MM-DD'
+        :param date_end: last date (included), 'YYYY-MM-DD'
+        :param clearsky_only: drop the days which are not clear-sky (the days with unknown clear-sky flag are kept,
+                              as in the training data of 43-1 and 43-2), None for the default of the feature spec
+        :return: DataFrame of the daily samples
+        """
+        df_samples, monitor_rows, date, clearsky = self._state
+        if clearsky_only is None:
+            clearsky_only = self.feature_spec['clearsky_only']
+        if sites is not None:
+            site_monitors = self.df_monitors.index[self.df_monitors['siteId'].isin(np.atleast_1d(sites))].tolist()
+            monitors = site_monitors if monitors is None else \
+                [MID_full for MID_full in np.atleast_1d(monitors) if MID_full in site_monitors]
+        if monitors is None:
+            positions = np.arange(len(df_samples))
+        else:
+            positions = [np.arange(*monitor_rows[MID_full]) for MID_full in pd.unique(np.atleast_1d(monitors))
+                         if MID_full in monitor_rows]
+            positions = np.concatenate(positions) if positions else np.array([], dtype=int)
+        mask = np.ones(len(positions), dtype=bool)
+        if date_start is not None:
+            mask &= date[positions] >= str(date_start)
+        if date_end is not None:
+            mask &= date[positions] <= str(date_end)
+        if clearsky_only:
+            mask &= clearsky[positions] != 0
+        return df_samples.iloc[positions[mask]]
+
+
+# ======================================================================================
+# = Model & latency
+# ======================================================================================
+def load_model(model_path):
+    """
+    :param model_path: pickled scikit-learn / xgboost model (43-1, 43-4), or TorchScript model '.pt' (43-2)
+    """
+    if model_path.endswith('.pt') or model_path.endswith('.pth'):
+        import torch  # only needed for the neural network models
+        model = torch.jit.load(model_path)
+        model.eval()
+        return model
+    with open(model_path, 'rb') as f:
+        return pickle.load(f)
+
+
+class LatencyRecorder():
+    """
+    latency of each call and the number of samples, for the p50/p99 latency and the throughput
+    """
+    def __init__(self, max_records=100000):
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self.records = []  # (start, end, samples)
+
+    def record(self, start, end, samples):
+        with self.lock:
+            self.records.append((start, end, samples))
+            if len(self.records) > self.max_records:
+                self.records = self.records[-self.max_records:]
+
+    def stats(self):
+        """
+        the throughput is the number of samples per second of busy time (time with at least one call running),
+        the idle time between the calls is not counted
+        """
+        with self.lock:
+            records = np.array(self.records, dtype=float).reshape(-1, 3)
+        if len(records) == 0:
+            return {'count': 0, 'samples': 0, 'p50_ms': None, 'p99_ms': None, 'busy_s': 0.0,
+                    'throughput_samples_per_s': None}
+        latency_ms = (records[:, 1] - records[:, 0]) * 1000
+        # length of the union of the [start, end] intervals, the concurrent calls are counted once
+        records = records[np.argsort(records[:, 0], kind='mergesort')]
+        previous_end = np.append(-np.inf, np.maximum.accumulate(records[:-1, 1]))
+        busy_time = np.clip(records[:, 1] - np.maximum(records[:, 0], previous_end), 0, None).sum()
+        return {'count': int(len(records)), 'samples': int(records[:, 2].sum()),
+                'p50_ms': float(np.percentile(latency_ms, 50)), 'p99_ms': float(np.percentile(latency_ms, 99)),
+                'busy_s': float(busy_time),
+                'throughput_samples_per_s': float(records[:, 2].sum() / busy_time) if busy_time > 0 else None}
+
+
+class BatchScorer():
+    """
+    warm model scoring a batch of daily samples in one call
+    """
+    def __init__(self, model_path, feature_spec=feature_spec_15min, class_names=None):
+        '''
+        :param feature_spec: format of the daily samples the model was trained on
+        :param class_names: names of the predicted classes, e.g., ['Others', 'Recurring Underperformance']
+        '''
+        self.model = load_model(model_path)
+        self.is_torch = model_path.endswith('.pt') or model_path.endswith('.pth')
+        self.feature_columns = feature_columns(feature_spec)
+        self.class_names = class_names
+        self.latency = LatencyRecorder()
+        # warm up, the first call of some models is much slower
+        self.predict(np.zeros((1, len(self.feature_columns)), dtype=np.float32))
+
+    def predict(self, X):
+        """
+        :param X: array (sample x time slot)
+        :return: predicted class, probability of the predicted class (None if not available)
+        """
+        if self.is_torch:
+            import torch
+            with torch.no_grad():
+                # the LSTM of 43-2 takes (batch, sequence, 1) and returns the probability of the fault
+                probability = self.model(torch.from_numpy(X).view(len(X), -1, 1)).numpy()[:, 0]
+            prediction = (probability > 0.5).astype(int)
+            return prediction, np.where(prediction == 1, probability, 1 - probability)
+        prediction = np.asarray(self.model.predict(X)).astype(int)
+        if hasattr(self.model, 'predict_proba'):
+            return prediction, np.asarray(self.model.predict_proba(X)).max(axis=1)
+        return prediction, None
+
+    def score(self, df_samples):
+        """
+        :param df_samples: daily samples from build_daily_samples / DailyFeatureStore
+        :return: DataFrame with 'MID', 'date', 'ClearSky', 'prediction', 'probability' (+ 'faultname' if class_names)
+        """
+        start = time.perf_counter()
+        df_scores = df_samples[[column for column in ['MID', 'date', 'ClearSky'] if column in df_samples.columns]].copy()
+        if len(df_samples):
+            prediction, probability = self.predict(df_samples[self.feature_columns].values.astype(np.float32))
+        else:
+            prediction, probability = np.array([], dtype=int), None
+        df_scores['prediction'] = prediction
+        df_scores['probability'] = probability if probability is not None else np.nan
+        if self.class_names is not None:
+            df_scores['faultname'] = np.array(self.class_names, dtype=object)[prediction]
+        self.latency.record(start, time.perf_counter(), len(df_samples))
+        return df_scores
+
+
+# ======================================================================================
+# = Micro-batching & HTTP endpoint
+# ======================================================================================
+class MicroBatcher():
+    """
+    group the concurrent requests into one model call:
+    a batch is scored once it has max_batch_size samples or the first request has waited max_wait_ms
+    """
+    def __init__(self, scorer, max_batch_size=4096, max_wait_ms=10):
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, df_samples):
+        future = Future()
+        self.queue.put((df_samples, future))
+        return future
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            n_samples = len(item[0])
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while n_samples < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                n_samples += len(item[0])
+            self.score_batch(batch)
+            if stop:
+                return
+
+    def score_batch(self, batch):
+        try:
+            df_scores = self.scorer.score(pd.concat([df_samples for df_samples, _ in batch], ignore_index=True))
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        offset = 0
+        for df_samples, future in batch:
+            future.set_result(df_scores.iloc[offset: offset + len(df_samples)])
+            offset += len(df_samples)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    # the default listen backlog (5) resets the connections of concurrent requests
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class ScoringService():
+    """
+    library API and local HTTP endpoint for the recurring-fault models
+
+    Method:
+        reload : rebuild the daily samples from the latest data, without stopping the service
+        score : score some monitors / sites and dates (library API, one batch)
+        score_fleet : score all the monitors for a date range (e.g., every morning after reload)
+        serve : local HTTP endpoint, POST /score {"monitors"|"sites", "date_start", "date_end", "clearsky_only"},
+                POST /reload {"time_start", "time_end"}, GET /stats
+    """
+    def __init__(self, model_path, data_paths, df_monitors, feature_spec=feature_spec_15min, class_names=None,
+                 clearsky_data_path='../preprocessed_data/PVsites_Clearsky_Production.csv',
+                 expected_data_path='../preprocessed_data/PVsites_Expected_Production.csv',
+                 time_start=None, time_end=None, max_batch_size=4096, max_wait_ms=10):
+        '''
+        :param feature_spec: format of the daily samples the model was trained on,
+                             feature_spec_15min (43-1, 43-2) | feature_spec_5min_daytime (43-4)
+        '''
+        self.scorer = BatchScorer(model_path=model_path, feature_spec=feature_spec, class_names=class_names)
+        self.feature_store = DailyFeatureStore(data_paths=data_paths, df_monitors=df_monitors,
+                                               feature_spec=feature_spec, clearsky_data_path=clearsky_data_path,
+                                               expected_data_path=expected_data_path)
+        self.time_start = time_start
+        self.time_end = time_end
+        self.reload()
+        self.batcher = MicroBatcher(scorer=self.scorer, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.request_latency = LatencyRecorder()
+
+    def reload(self, time_start=None, time_end=None):
+        """
+        :param time_start: start of the data to read, None to keep the previous one
+        :param time_end: end of the data to read, None to keep the previous one
+        :return: number of daily samples
+        """
+        if time_start is not None:
+            self.time_start = time_start
+        if time_end is not None:
+            self.time_end = time_end
+        self.feature_store.load(time_start=self.time_start, time_end=self.time_end)
+        return len(self.feature_store.df_samples)
+
+    def score(self, monitors=None, sites=None, date_start=None, date_end=None, clearsky_only=None):
+        df_samples = self.feature_store.lookup(monitors=monitors, sites=sites, date_start=date_start,
+                                               date_end=date_end, clearsky_only=clearsky_only)
+        return self.scorer.score(df_samples)
+
+    def score_fleet(self, date_start=None, date_end=None, clearsky_only=None):
+        return self.score(date_start=date_start, date_end=date_end, clearsky_only=clearsky_only)
+
+    def stats(self):
+        return {'model': self.scorer.latency.stats(), 'request': self.request_latency.stats()}
+
+    def handle_request(self, request):
+        start = time.perf_counter()
+        df_samples = self.feature_store.lookup(monitors=request.get('monitors'), sites=request.get('sites'),
+                                               date_start=request.get('date_start'),
+                                               date_end=request.get('date_end'),
+                                               clearsky_only=request.get('clearsky_only'))
+        df_scores = self.batcher.submit(df_samples).result()
+        self.request_latency.record(start, time.perf_counter(), len(df_samples))
+        return df_scores
+
+    def serve(self, host='127.0.0.1', port=8050):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def send_json(self, status, content):
+                body = json.dumps(content).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/stats':
+                    self.send_json(200, service.stats())
+                else:
+                    self.send_json(404, {'error': 'not found'})
+
+            def do_POST(self):
+                if self.path not in ['/score', '/reload']:
+                    self.send_json(404, {'error': 'not found'})
+                    return
+                try:
+                    request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                    if self.path == '/reload':
+                        self.send_json(200, {'samples': service.reload(time_start=request.get('time_start'),
+                                                                       time_end=request.get('time_end'))})
+                        return
+                    df_scores = service.handle_request(request)
+                except Exception as error:
+                    self.send_json(400, {'error': str(error)})
+                    return
+                df_scores = df_scores.astype(object).where(df_scores.notna(), None)
+                self.send_json(200, {'scores': df_scores.to_dict(orient='records')})
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ScoringHTTPServer((host, port), Handler)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.batcher.close()
+
+
+if __name__ == '__main__':
+    df_monitors = pd.read_csv('../../input_data/MNTR_ddb_20230630.csv')
+    scoring_service = ScoringService(model_path='../../4-FaultDetection_ACLevel/machine_learning/models/recurring_xgb.pkl',
+                                     data_paths=['../../preprocessed_data/5min_rawdata_20230630.csv',
+                                                 '../../preprocessed_data/15min_rawdata_20230630.csv'],
+                                     df_monitors=df_monitors, feature_spec=feature_spec_15min,
+                                     class_names=['Others', 'Recurring Underperformance'],
+                                     clearsky_data_path='../../preprocessed_data/PVsites_Clearsky_Production.csv',
+                                     expected_data_path='../../preprocessed_data/PVsites_Expected_Production.csv')
+    # # multiclass model of 43-4: feature_spec=feature_spec_5min_daytime, data_paths=[5-minute raw data]
+    # # every morning: read the new data, then score the fleet
+    # scoring_service.reload()
+    # df_scores = scoring_service.score_fleet(date_start='2023-06-29', date_end='2023-06-29')
+    scoring_service.serve()
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+Sharded execution of the fleet labelling with checkpointing
+- monitors are partitioned into N shards by a stable hash of the monitor id
+- a sqlite work queue (on a file system shared by the worker nodes) hands out one monitor at a time
+- the results of each monitor are written to a checkpoint file as soon as the monitor is labelled
+- the lease of a monitor is renewed by a heartbeat while it is labelled, so the monitor of a crashed worker is
+  claimed again after a few minutes; a worker restarted with the same worker id takes its own monitors back at once
+- a worker only exits when no monitor is pending or running, so the fleet is finished even if another worker crashed
+- the checkpoints are merged in the monitor order of the fleet list, so the merged output does not depend
+  on which worker labelled which monitor
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import os
+import time
+import socket
+import threading
+import sqlite3
+import hashlib
+import traceback
+import contextlib
+import multiprocessing
+import pandas as pd
+
+##========== Global Parameter ====================
+lease_seconds = 10 * 60  # a claimed monitor is handed out again if its lease is not renewed within 10 minutes
+heartbeat_seconds = 60  # the lease of the monitor being labelled is renewed every minute
+poll_seconds = 5  # a worker without monitor to claim waits for the running ones of the other workers
+max_attempts = 3  # a monitor failing more often than this is marked as failed
+
+
+def monitor_shard(MID, n_shards):
+    """
+    stable shard of a monitor (python's hash() is salted per process, so md5 is used)
+    :param MID: monitor id
+    :param n_shards: number of shards
+    :return: shard number in [0, n_shards)
+    """
+    return int(hashlib.md5(str(MID).encode('utf-8')).hexdigest(), 16) % n_shards
+
+
+# ======================================================================================
+# = Work queue
+# ======================================================================================
+class MonitorWorkQueue():
+    """
+    sqlite work queue of the monitors to be labelled
+
+    Method:
+        enqueue : add the monitors (already queued monitors keep their status)
+        claim : atomically take a pending monitor, preferring the given shards
+        renew : extend the lease of a claimed monitor (heartbeat)
+        complete / fail : report the result of a claimed monitor
+        unfinished : number of monitors pending or running
+        progress : number of monitors per status
+    """
+    def __init__(self, db_path, lease_seconds=lease_seconds, max_attempts=max_attempts):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with contextlib.closing(self.connect()) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS tasks ('
+                         'monitor TEXT PRIMARY KEY, shard INTEGER, status TEXT, worker TEXT, '
+                         'lease_until REAL, attempts INTEGER, error TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, shard)')
+
+    def connect(self):
+        # autocommit mode, the transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+
+    def enqueue(self, monitor_list, n_shards):
+        with contextlib.closing(self.connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany("INSERT OR IGNORE INTO tasks VALUES (?, ?, 'pending', NULL, NULL, 0, NULL)",
+                             [(MID, monitor_shard(MID, n_shards)) for MID in monitor_list])
+            conn.execute('COMMIT')
+
+    def claim(self, worker_id, shards=None, steal=True):
+        """
+        :param worker_id: name of the worker
+        :param shards: shards of this worker, None for any shard
+        :param steal: take monitors of other shards once the own shards are finished
+        :return: monitor id, or None if there is nothing left to claim
+        """
+        now = time.time()
+        with contextlib.closing(self.connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # monitors of crashed workers go back to the queue, as well as the monitors held under this worker id
+            # (the same worker restarted after a crash), unless they already crashed max_attempts workers
+            conn.execute("UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                         "worker = NULL, lease_until = NULL, "
+                         "error = CASE WHEN attempts >= ? THEN 'worker lost while labelling' ELSE error END "
+                         "WHERE status = 'running' AND (lease_until < ? OR worker = ?)",
+                         (self.max_attempts, self.max_attempts, now, worker_id))
+            row = None
+            if shards is not None:
+                row = conn.execute("SELECT monitor FROM tasks WHERE status = 'pending' AND shard IN ({}) "
+                                   "ORDER BY shard, monitor LIMIT 1".format(','.join('?' * len(shards))),
+                                   [int(shard) for shard in shards]).fetchone()
+            if row is None and (shards is None or steal):
+                row = conn.execute("SELECT monitor FROM tasks WHERE status = 'pending' "
+                                   "ORDER BY shard, monitor LIMIT 1").fetchone()
+            if row is not None:
+                conn.execute("UPDATE tasks SET status = 'running', worker = ?, lease_until = ?, "
+                             "attempts = attempts + 1 WHERE monitor = ?",
+                             (worker_id, now + self.lease_seconds, row[0]))
+            conn.execute('COMMIT')
+        return None if row is None else row[0]
+
+    def renew(self, MID, worker_id):
+        with contextlib.closing(self.connect()) as conn:
+            conn.execute("UPDATE tasks SET lease_until = ? WHERE monitor = ? AND worker = ? AND status = 'running'",
+                         (time.time() + self.lease_seconds, MID, worker_id))
+
+    def complete(self, MID, worker_id):
+        with contextlib.closing(self.connect()) as conn:
+            conn.execute("UPDATE tasks SET status = 'done', lease_until = NULL "
+                         "WHERE monitor = ? AND worker = ?", (MID, worker_id))
+
+    def fail(self, MID, worker_id, error):
+        with contextlib.closing(self.connect()) as conn:
+            conn.execute("UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                         "worker = NULL, lease_until = NULL, error = ? WHERE monitor = ? AND worker = ?",
+                         (self.max_attempts, error, MID, worker_id))
+
+    def unfinished(self, shards=None):
+        with contextlib.closing(self.connect()) as conn:
+            if shards is None:
+                row = conn.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'running')").fetchone()
+            else:
+                row = conn.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'running') "
+                                   "AND shard IN ({})".format(','.join('?' * len(shards))),
+                                   [int(shard) for shard in shards]).fetchone()
+        return row[0]
+
+    def progress(self):
+        with contextlib.closing(self.connect()) as conn:
+            rows = conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall()
+        return dict(rows)
+
+
+# ======================================================================================
+# = Checkpoints
+# ======================================================================================
+def checkpoint_path(checkpoint_dir, MID, name=None):
+    if name is None:
+        return os.path.join(checkpoint_dir, '{}.csv'.format(MID))
+    return os.path.join(checkpoint_dir, '{}_{}.csv'.format(MID, name))
+
+
+def save_checkpoint(checkpoint_dir, MID, df_checkpoint, name=None):
+    """
+    write the results of one monitor, through a temporary file so that a crash never leaves a partial checkpoint
+    :param name: None for the labels, 'daily' for the daily rollup
+    """
+    if not os.path.exists(checkpoint_dir):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    path = checkpoint_path(checkpoint_dir, MID, name=name)
+    path_tmp = '{}.{}.tmp'.format(path, os.getpid())
+    df_checkpoint.to_csv(path_tmp, index=None)
+    os.replace(path_tmp, path)
+
+
+def read_checkpoint(checkpoint_dir, MID, name=None):
+    path = checkpoint_path(checkpoint_dir, MID, name=name)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, parse_dates=['time' if name is None else 'date'])
+
+
+# ======================================================================================
+# = Workers
+# ======================================================================================
+def default_worker_id():
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+@contextlib.contextmanager
+def lease_heartbeat(queue, MID, worker_id, interval=heartbeat_seconds):
+    """
+    renew the lease of a claimed monitor in a background thread while it is labelled
+    """
+    stop = threading.Event()
+
+    def renew_lease():
+        while not stop.wait(interval):
+            queue.renew(MID, worker_id)
+
+    thread = threading.Thread(target=renew_lease, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_worker(labelling, queue_path, checkpoint_dir, worker_id=None, shards=None, steal=True):
+    """
+    claim and label monitors until no monitor is pending or running
+    :param labelling: FIMER_DCAC_Labelling, with the raw data already read
+    :param queue_path: sqlite file of the work queue
+    :param checkpoint_dir: directory of the per-monitor checkpoints
+    :param worker_id: name of the worker, default host:pid (use a stable name to take the monitors back after a restart)
+    :param shards: shards of this worker, None for any shard
+    :param steal: take monitors of other shards once the own shards are finished
+    :return: list of the monitors labelled by this worker
+    """
+    worker_id = worker_id or default_worker_id()
+    queue = MonitorWorkQueue(queue_path)
+    labelled_list = []
+    while True:
+        MID = queue.claim(worker_id=worker_id, shards=shards, steal=steal)
+        if MID is None:
+            # the monitors running on other workers come back to the queue if their worker crashes
+            if queue.unfinished(shards=None if steal else shards) == 0:
+                break
+            time.sleep(poll_seconds)
+            continue
+        try:
+            with lease_heartbeat(queue, MID, worker_id):
+                df_daily = labelling.label_monitor(MID=MID)
+                save_checkpoint(checkpoint_dir, MID, labelling.pop_monitor_results(MID=MID))
+                save_checkpoint(checkpoint_dir, MID, df_daily, name='daily')
+        except Exception:
+            labelling.pop_monitor_results(MID=MID)
+            queue.fail(MID, worker_id, traceback.format_exc())
+            continue
+        queue.complete(MID, worker_id)
+        labelled_list.append(MID)
+    return labelled_list
+
+
+def run_local_workers(labelling, queue_path, checkpoint_dir, n_shards, n_workers):
+    """
+    local stand-in of the multi-node execution: one process per worker, worker i owns the shards i, i+n_workers, ...
+    :param labelling: FIMER_DCAC_Labelling
+    :return: progress of the work queue
+    """
+    process_list = []
+    for w in range(n_workers):
+        process = multiprocessing.Process(target=labelling.Sharded_Labelling_Process,
+                                          kwargs={'queue_path': queue_path, 'checkpoint_dir': checkpoint_dir,
+                                                  'n_shards': n_shards,
+                                                  'worker_id': '{}:local-{}'.format(socket.gethostname(), w),
+                                                  'shards': list(range(w, n_shards, n_workers))})
+        process.start()
+        process_list.append(process)
+    for process in process_list:
+        process.join()
+    return MonitorWorkQueue(queue_path).progress()
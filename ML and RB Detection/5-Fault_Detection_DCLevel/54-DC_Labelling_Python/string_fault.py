@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+String fault detection for all the monitors with string-level (MPPT) DC data
+Same method as 52-StringFault_Single.ipynb, run on batches of monitors with (day x time of day x monitor) arrays:
+1. the clear-sky generation (POA) of each day is rescaled to the measured peak -> expected shape
+2. the expected shape of the day with the highest generation is the baseline
+3. 1st check: during 9 am - 4 pm, the reduction to the baseline is constant (>threshold_points_daily points)
+   and larger than threshold_reduction
+4. 2nd check: the reduction is the same as on the previous clear-sky day
+5. string fault: the 2nd check is true on at least threshold_days consecutive clear-sky days
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import os
+import warnings
+import pandas as pd
+import numpy as np
+from read_preprocess_data import get_irradiance
+from clearsky_day import ClearSkyDay
+from labelling_utils import run_length_duration
+
+##========== Global Parameter ====================
+# metrics of the string-level DC power, in priority order
+concern_metric_list = ['Inv.DC.P.MPTT1.W', 'Inv.DC.P.W']
+
+# for clear-sky days
+threshold_low_cloudiness = 0.8
+
+# for theoretical clear-sky generation (only the shape is used)
+tilt = 10
+azimuth = 10
+loss_factor = 0.85
+
+# for string fault detection
+threshold_time = 1  # 1%
+threshold_reduction = 10  # 10%
+threshold_constant = 3  # the variable threshold value for the reduction percentage of same string number issue
+threshold_days = 2
+hour_start, hour_end = 9, 16  # 9 am - 4 pm
+threshold_points_daily = int((hour_end - hour_start) * 12 // 2)  # for 5-minute data
+points_per_day = 288
+
+
+# ======================================================================================
+# = Vectorised detection for a batch of monitors
+# ======================================================================================
+def top_percentile_mean(values, percentile=99):
+    """
+    mean of the values above the percentile, along the time-of-day axis
+    :param values: array (day x time of day x monitor)
+    :return: array (day x monitor)
+    """
+    threshold = np.percentile(values, percentile, axis=1, keepdims=True)
+    mask = values >= threshold
+    return np.where(mask, values, 0).sum(axis=1) / mask.sum(axis=1)
+
+
+def detect_string_fault(power, poa, clearsky, valid_day):
+    """
+    :param power: string-level DC power, array (day x time of day x monitor), missing data filled with 0
+    :param poa: theoretical clear-sky generation, same shape
+    :param clearsky: clear-sky days, boolean array (day x monitor)
+    :param valid_day: days between the first and the last non-zero generation, boolean array (day x monitor)
+    :return: dict of arrays (day x monitor): points_same, reduction(%), 1stcheck_potential_string_fault,
+             2ndcheck_potential_string_fault, string_fault, and the evaluated days
+    """
+    n_day, n_slot, n_monitor = power.shape
+    monitor_idx = np.arange(n_monitor)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # rescale the theoretical power to the actual one
+        expected_shape = poa * (top_percentile_mean(power) / top_percentile_mean(poa))[:, np.newaxis, :]
+
+        # baseline: the expected shape of the day with the highest 99th percentile
+        percentile_99 = np.where(valid_day, np.percentile(power, 99, axis=1), -np.inf)
+        baseline_day = percentile_99.argmax(axis=0)
+        baseline = expected_shape[baseline_day, :, monitor_idx].T  # time of day x monitor
+        baseline_max = power[baseline_day, :, monitor_idx].max(axis=1)
+
+        diff_baseline = (baseline[np.newaxis] - expected_shape) / baseline_max * 100
+    diff_over_time = np.zeros(diff_baseline.shape)
+    diff_over_time[:, 1:] = np.abs(np.diff(diff_baseline, axis=1))
+    slot_hour = np.arange(n_slot) * 24 // n_slot
+    in_window = ((slot_hour >= hour_start) & (slot_hour <= hour_end))[np.newaxis, :, np.newaxis]
+    reduction_same = (diff_over_time < threshold_time) & in_window
+
+    # ==== 1st check for each day
+    points_same = reduction_same.sum(axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        reduction = np.nanmedian(np.where(reduction_same, diff_baseline, np.nan), axis=1)
+    evaluated = clearsky & valid_day
+    with np.errstate(invalid='ignore'):
+        first_check = (points_same > threshold_points_daily) & (reduction > threshold_reduction) & evaluated
+
+    # ==== 2nd check on the sequence of clear-sky days of each monitor
+    second_check = np.zeros(first_check.shape, dtype=bool)
+    string_fault = np.zeros(first_check.shape, dtype=bool)
+    for m in range(n_monitor):
+        day_list = np.nonzero(evaluated[:, m])[0]
+        if len(day_list) == 0:
+            continue
+        diff_daily_same = np.zeros(len(day_list), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            diff_daily_same[1:] = np.abs(np.diff(reduction[day_list, m])) < threshold_constant
+        check = diff_daily_same & first_check[day_list, m]
+        second_check[day_list, m] = check
+        string_fault[day_list, m] = check & \
+            (run_length_duration(check[:, np.newaxis])[:, 0] >= threshold_days)
+
+    return {'points_same': points_same, 'reduction(%)': reduction,
+            '1stcheck_potential_string_fault': first_check, '2ndcheck_potential_string_fault': second_check,
+            'string_fault': string_fault, 'evaluated': evaluated}
+
+
+# ======================================================================================
+# = Fleet string fault detection
+# ======================================================================================
+class StringFault_Detection():
+    """
+    string fault detection for all the monitors in the DC data files
+
+    Method:
+        read_dc_data : read the string-level DC power columns only
+        detect_batch : detect the string faults of a batch of monitors
+        String_Fault_Process : all the monitors, results in the format of the FIMER labels
+    """
+    def __init__(self, time_start, time_end, df_monitors, df_sites, dc_data_path_list,
+                 clearsky_data_path='../preprocessed_data/PVsites_Clearsky_Production.csv',
+                 expected_data_path='../preprocessed_data/PVsites_Expected_Production.csv'):
+        '''
+        :param dc_data_path_list: wide csv files, 'time' + columns '{metric}:MNTR|{MID}',
+                                  e.g., FIMER_20231019.csv, df_SMA_0.csv, ...
+        '''
+        self.time_start = time_start
+        self.time_end = time_end
+        self.df_monitors = df_monitors.drop_duplicates(subset='source').set_index('source')
+        self.df_sites = df_sites.drop_duplicates(subset='source').set_index('source')
+        self.dc_data_path_list = dc_data_path_list
+
+        # whole days of 5-minute data
+        self.date_list = pd.date_range(start=pd.to_datetime(self.time_start).normalize(),
+                                       end=pd.to_datetime(self.time_end).normalize(), freq='D')
+        self.time_index5min = pd.date_range(start=self.date_list[0], periods=len(self.date_list) * points_per_day,
+                                            freq='5min')
+
+        # clear-sky days of all the sites, shared by all the monitors
+        select_clearsky_days = ClearSkyDay(threshold_low_cloudiness=threshold_low_cloudiness,
+                                           clearsky_data_path=clearsky_data_path,
+                                           expected_data_path=expected_data_path,
+                                           site_id=None, time_start=self.time_start, time_end=self.time_end)
+        df_clearsky_days = select_clearsky_days.identify_clearsky_days()
+        self.df_clearsky_days = df_clearsky_days.set_index('date').reindex(
+            self.date_list.strftime('%Y-%m-%d')).fillna(False).astype(bool)
+
+        # dataframe for saving the results
+        self.df_String_Fault = pd.DataFrame(index=np.arange(len(self.time_index5min)))
+        self.df_String_Fault['time'] = self.time_index5min
+        self.df_string_fault_daily = pd.DataFrame()
+
+    def read_dc_data(self, dc_data_path):
+        """
+        read only the string-level DC power column of each monitor
+        :return: DataFrame on self.time_index5min, one column per monitor ('MNTR|...')
+        """
+        column_list = pd.read_csv(dc_data_path, nrows=0).columns
+        metric_columns = {}
+        for column in column_list:
+            metric_name, _, MID_full = column.partition(':')
+            if metric_name in concern_metric_list:
+                # keep the metric with the highest priority for each monitor
+                if MID_full not in metric_columns or concern_metric_list.index(metric_name) < \
+                        concern_metric_list.index(metric_columns[MID_full].partition(':')[0]):
+                    metric_columns[MID_full] = column
+        # the df_SMA_*.csv files are saved with the pandas index as first column, the time is in 'time'
+        df_dc = pd.read_csv(dc_data_path, usecols=['time'] + list(metric_columns.values()),
+                            dtype={column: np.float32 for column in metric_columns.values()})
+        df_dc['time'] = pd.to_datetime(df_dc['time'])
+        df_dc = df_dc.drop_duplicates(subset='time').set_index('time')
+        df_dc = df_dc.reindex(self.time_index5min)
+        df_dc.columns = [column.partition(':')[2] for column in df_dc.columns]
+        return df_dc
+
+    def theoretical_power(self, MID_full):
+        site_id = self.df_monitors.loc[MID_full, 'siteId']
+        time_zone = self.df_sites.loc[site_id, 'timezone']
+        latitude = float(self.df_monitors.loc[MID_full, 'latitude'][1:])
+        longitude = float(self.df_monitors.loc[MID_full, 'longitude'])
+        pv_size = self.df_monitors.loc[MID_full, 'pvSizeWatt']
+        time_index5min_local = self.time_index5min.tz_localize(time_zone, ambiguous=False,
+                                                               nonexistent='shift_forward')
+        df_theoretical = get_irradiance(time_index5min_local=time_index5min_local, time_zone=time_zone,
+                                        tilt=tilt, surface_azimuth=azimuth, latitude=latitude,
+                                        longitude=longitude, pv_size=pv_size, loss_factor=loss_factor)
+        return df_theoretical['POA'].values
+
+    def detect_batch(self, df_dc_batch):
+        """
+        :param df_dc_batch: string-level DC power of a batch of monitors, one column per monitor
+        :return: dict of arrays (day x monitor), see detect_string_fault
+        """
+        n_day = len(self.date_list)
+        monitor_list = df_dc_batch.columns.tolist()
+        power = df_dc_batch.fillna(0).values.reshape(n_day, points_per_day, len(monitor_list))
+        poa = np.stack([self.theoretical_power(MID_full) for MID_full in monitor_list], axis=1) \
+            .reshape(n_day, points_per_day, len(monitor_list))
+
+        site_list = [self.df_monitors.loc[MID_full, 'siteId'] for MID_full in monitor_list]
+        clearsky = np.stack([self.df_clearsky_days[site_id].values if site_id in self.df_clearsky_days.columns
+                             else np.zeros(n_day, dtype=bool) for site_id in site_list], axis=1)
+
+        # days between the first and the last non-zero generation
+        daily_nonzero = (power != 0).any(axis=1)
+        day_idx = np.arange(n_day)[:, np.newaxis]
+        first_day = np.where(daily_nonzero.any(axis=0), daily_nonzero.argmax(axis=0), n_day)
+        last_day = n_day - 1 - daily_nonzero[::-1].argmax(axis=0)
+        valid_day = (day_idx >= first_day) & (day_idx <= last_day)
+
+        return detect_string_fault(power=power, poa=poa, clearsky=clearsky, valid_day=valid_day)
+
+    def save_batch(self, monitor_list, results):
+        # 5-minute labels: the analysis window of the string fault days, NaN for the days not evaluated
+        slot_hour = np.arange(points_per_day) * 24 // points_per_day
+        in_window = (slot_hour >= hour_start) & (slot_hour <= hour_end)
+        label = results['string_fault'][:, np.newaxis, :] & in_window[np.newaxis, :, np.newaxis]
+        label = label.reshape(-1, len(monitor_list)).astype(object)
+        evaluated = np.repeat(results['evaluated'], points_per_day, axis=0)
+        label[~evaluated] = np.nan
+        self.df_String_Fault = pd.concat([self.df_String_Fault, pd.DataFrame(label, columns=monitor_list)], axis=1)
+
+        # daily results of the evaluated days
+        day_idx, monitor_idx = np.nonzero(results['evaluated'])
+        df_daily = pd.DataFrame({'monitor': np.array(monitor_list, dtype=object)[monitor_idx],
+                                 'date': self.date_list[day_idx].strftime('%Y-%m-%d')})
+        for name in ['points_same', 'reduction(%)', '1stcheck_potential_string_fault',
+                     '2ndcheck_potential_string_fault', 'string_fault']:
+            df_daily[name] = results[name][day_idx, monitor_idx]
+        self.df_string_fault_daily = pd.concat([self.df_string_fault_daily, df_daily], ignore_index=True)
+
+    def String_Fault_Process(self, batch_size=100):
+        for dc_data_path in self.dc_data_path_list:
+            df_dc = self.read_dc_data(dc_data_path=dc_data_path)
+            # only the monitors with meta data, and not already processed from another file
+            monitor_list = [MID_full for MID_full in df_dc.columns if MID_full in self.df_monitors.index
+                            and MID_full not in self.df_String_Fault.columns]
+            for b in range(0, len(monitor_list), batch_size):
+                batch_list = monitor_list[b: b + batch_size]
+                results = self.detect_batch(df_dc_batch=df_dc[batch_list])
+                self.save_batch(monitor_list=batch_list, results=results)
+
+        # # save final results
+        if not os.path.exists('results'):
+            os.makedirs('results')
+        self.df_String_Fault.to_csv('results/df_string_fault.csv')
+        self.df_string_fault_daily.to_csv('results/df_string_fault_daily.csv', index=None)
+
+
+if __name__ == '__main__':
+    time_start = '2022-07-30'
+    time_end = '2023-07-30'
+    df_sites = pd.read_csv('../input_data/SITE_nodeType_20230630.csv')
+    df_monitors = pd.read_csv('../input_data/MNTR_ddb_20230630.csv')
+    string_fault_detection = StringFault_Detection(
+        time_start, time_end, df_monitors, df_sites,
+        dc_data_path_list=['../preprocessed_data/monitors_DCdata/FIMER_20231019.csv',
+                           '../preprocessed_data/monitors_DCdata/df_SMA_0.csv',
+                           '../preprocessed_data/monitors_DCdata/df_SMA_1.csv',
+                           '../preprocessed_data/monitors_DCdata/df_SMA_2.csv'])
+    string_fault_detection.String_Fault_Process()
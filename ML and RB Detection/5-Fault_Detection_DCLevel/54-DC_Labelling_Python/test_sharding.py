@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+Sharded labelling with the local multi-process stand-in: crash, resume and merge
+The labelling itself is replaced by a stub with the same interface as FIMER_DCAC_Labelling
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import os
+import socket
+import hashlib
+import pandas as pd
+import numpy as np
+import sharding
+from sharding import MonitorWorkQueue, run_worker, run_local_workers, read_checkpoint
+from FIMER import FIMER_DCAC_Labelling
+
+##========== Global Parameter ====================
+monitor_list = ['m{}'.format(i) for i in range(20)]
+n_shards = 8
+
+
+def expected_values(MID):
+    seed = int(hashlib.md5(MID.encode('utf-8')).hexdigest(), 16) % 2 ** 32
+    return np.random.default_rng(seed).random(3) > 0.5
+
+
+class StubLabelling():
+    """
+    label_monitor / pop_monitor_results of FIMER_DCAC_Labelling with deterministic results,
+    crash_MID kills the worker process the first time it is labelled (every time without marker_path),
+    fail_MID always raises
+    """
+    Sharded_Labelling_Process = FIMER_DCAC_Labelling.Sharded_Labelling_Process
+
+    def __init__(self, marker_path=None, crash_MID=None, fail_MID=None):
+        self.fimer_list = monitor_list
+        self.marker_path = marker_path
+        self.crash_MID = crash_MID
+        self.fail_MID = fail_MID
+        self.results = {}
+
+    def check_rawdata_files(self):
+        pass
+
+    def label_monitor(self, MID):
+        if MID == self.crash_MID:
+            if self.marker_path is None:
+                os._exit(1)
+            if not os.path.exists(self.marker_path):
+                open(self.marker_path, 'w').close()
+                os._exit(1)
+        if MID == self.fail_MID:
+            raise ValueError('no data for {}'.format(MID))
+        self.results[MID] = expected_values(MID)
+        return pd.DataFrame({'monitor': 'MNTR|' + MID, 'date': pd.to_datetime(['2023-01-01']),
+                             'fault_minutes': [5.0 * self.results[MID].sum()]})
+
+    def pop_monitor_results(self, MID):
+        values = self.results.pop(MID, np.zeros(3, dtype=bool))
+        return pd.DataFrame({'time': pd.date_range('2023-01-01 10:00', periods=3, freq='5min'),
+                             'inverter_clipping:MNTR|{}'.format(MID): values})
+
+
+def check_checkpoints(checkpoint_dir, MID_list):
+    for MID in MID_list:
+        df_checkpoint = read_checkpoint(checkpoint_dir, MID)
+        df_daily = read_checkpoint(checkpoint_dir, MID, name='daily')
+        assert df_checkpoint is not None and df_daily is not None, MID
+        np.testing.assert_array_equal(df_checkpoint['inverter_clipping:MNTR|{}'.format(MID)].values,
+                                      expected_values(MID))
+        assert df_daily['fault_minutes'].iloc[0] == 5.0 * expected_values(MID).sum()
+
+
+def test_resume_after_worker_crash(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, 'poll_seconds', 0.1)
+    queue_path = str(tmp_path / 'queue.sqlite')
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+
+    # the first run of local-0 dies while labelling m7, which stays 'running' under its lease
+    crashing = StubLabelling(marker_path=str(tmp_path / 'crashed'), crash_MID='m7')
+    process = sharding.multiprocessing.Process(
+        target=crashing.Sharded_Labelling_Process,
+        kwargs={'queue_path': queue_path, 'checkpoint_dir': checkpoint_dir, 'n_shards': n_shards,
+                'worker_id': '{}:local-0'.format(socket.gethostname())})
+    process.start()
+    process.join()
+    assert process.exitcode == 1
+    assert MonitorWorkQueue(queue_path).progress()['running'] == 1
+
+    # resume: local-0 takes m7 back, the other workers wait until the queue is drained
+    progress = run_local_workers(StubLabelling(), queue_path=queue_path, checkpoint_dir=checkpoint_dir,
+                                 n_shards=n_shards, n_workers=4)
+    assert progress == {'done': len(monitor_list)}
+    check_checkpoints(checkpoint_dir, monitor_list)
+
+
+def test_expired_lease_and_failed_monitor(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, 'poll_seconds', 0.1)
+    queue_path = str(tmp_path / 'queue.sqlite')
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+
+    # a monitor claimed by a worker of another host which never comes back
+    queue = MonitorWorkQueue(queue_path, lease_seconds=-1)
+    queue.enqueue(monitor_list, n_shards=n_shards)
+    assert queue.claim(worker_id='lost-host:1') is not None
+
+    labelled_list = run_worker(StubLabelling(fail_MID='m3'), queue_path=queue_path, checkpoint_dir=checkpoint_dir)
+    assert sorted(labelled_list) == sorted(set(monitor_list) - {'m3'})
+    assert MonitorWorkQueue(queue_path).progress() == {'done': len(monitor_list) - 1, 'failed': 1}
+    check_checkpoints(checkpoint_dir, labelled_list)
+
+
+def test_monitor_crashing_every_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, 'poll_seconds', 0.1)
+    queue_path = str(tmp_path / 'queue.sqlite')
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+
+    # m0 kills the worker each time, the worker is restarted with the same id until it exits normally
+    crashing = StubLabelling(crash_MID='m0')
+    exitcode_list = []
+    while len(exitcode_list) < 2 * sharding.max_attempts:
+        process = sharding.multiprocessing.Process(
+            target=crashing.Sharded_Labelling_Process,
+            kwargs={'queue_path': queue_path, 'checkpoint_dir': checkpoint_dir, 'n_shards': n_shards,
+                    'worker_id': '{}:local-0'.format(socket.gethostname())})
+        process.start()
+        process.join()
+        exitcode_list.append(process.exitcode)
+        if process.exitcode == 0:
+            break
+    assert exitcode_list == [1] * sharding.max_attempts + [0]
+    assert MonitorWorkQueue(queue_path).progress() == {'done': len(monitor_list) - 1, 'failed': 1}
+    check_checkpoints(checkpoint_dir, [MID for MID in monitor_list if MID != 'm0'])
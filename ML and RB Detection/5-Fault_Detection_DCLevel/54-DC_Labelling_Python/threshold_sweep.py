@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Created at 19/10/2026
+"""
+'''
+Threshold sweep for calibrating the fault rules in Labelling_FIMER.py
+All threshold configurations are evaluated in one pass over the preprocessed data of each monitor:
+the measurements are shared and the rules are broadcast over a (time x configuration) array.
+'''
+
+## ======================================================
+## = IMPORT PACKAGES
+## ======================================================
+import itertools
+import pandas as pd
+import numpy as np
+from Labelling_FIMER import threshold_performance_clipp_upper, threshold_performance_clipp_lower, \
+    threshold_clipp_time, sun_thre_start, sun_thred_end
+from labelling_utils import run_length_duration
+
+##========== Global Parameter ====================
+# thresholds that can be swept, the voltage defaults are given by the caller (FIMER.py)
+sweep_threshold_names = ['ac_overvoltage_threshold', 'ac_blackout_vol_threshold',
+                         'acvoltage_volt_watt_threshold', 'acvoltage_volt_var_threshold',
+                         'threshold_performance_clipp_upper', 'threshold_performance_clipp_lower',
+                         'threshold_clipp_time']
+# labels produced by the rules of Labelling_FIMER.py
+sweep_label_names = ['grid_overVol', 'blakout', 'undersize_mppt_InVol', 'DC_issue_Gen0',
+                     'volt_watt', 'volt_var', 'inverter_clipping', 'DCside_issue_flat']
+
+
+# ======================================================================================
+# = Threshold grid
+# ======================================================================================
+def build_threshold_grid(threshold_grid, default_thresholds):
+    """
+    build the table of threshold configurations, one row per configuration
+    :param threshold_grid: dict {threshold name: list of values} (full product is taken) or a DataFrame
+                           with one configuration per row
+    :param default_thresholds: dict {threshold name: value} used for the thresholds not in the grid
+    :return: DataFrame with one column per threshold in sweep_threshold_names
+    """
+    defaults = {'threshold_performance_clipp_upper': threshold_performance_clipp_upper,
+                'threshold_performance_clipp_lower': threshold_performance_clipp_lower,
+                'threshold_clipp_time': threshold_clipp_time}
+    defaults.update(default_thresholds)
+
+    if isinstance(threshold_grid, pd.DataFrame):
+        df_grid = threshold_grid.copy()
+    else:
+        unknown = set(threshold_grid) - set(sweep_threshold_names)
+        if unknown:
+            raise ValueError('unknown threshold(s) in the grid: {}'.format(sorted(unknown)))
+        names = list(threshold_grid.keys())
+        df_grid = pd.DataFrame(list(itertools.product(*[np.atleast_1d(threshold_grid[name]) for name in names])),
+                               columns=names)
+    for name in sweep_threshold_names:
+        if name not in df_grid.columns:
+            df_grid[name] = defaults[name]
+    df_grid = df_grid[sweep_threshold_names]
+    df_grid.index = np.arange(len(df_grid))
+    df_grid.index.name = 'config'
+    return df_grid
+
+
+# ======================================================================================
+# = Vectorised rules
+# ======================================================================================
+def sweep_monitor(df, df_grid, diff_name, metric_name):
+    """
+    evaluate all threshold configurations for one preprocessed monitor
+    the rules are the same as in Labelling_FIMER.py, broadcast over the configuration axis
+    :param df: preprocessed dataframe of one monitor, with the '{diff_name}_Pdiff' column
+    :param df_grid: threshold configurations from build_threshold_grid
+    :param diff_name: 'AC' | 'DC'
+    :param metric_name: 'Gen.W' | 'Inv.DC.P.W'
+    :return: dict {label name: boolean array (time x configuration)}
+    """
+    def col(name):
+        return df_grid[name].values[np.newaxis, :]
+
+    ac_vol = df['Inv.AC.U.V'].values.astype(float)[:, np.newaxis]
+    dc_vol = df['Inv.DC.U.V'].values.astype(float)[:, np.newaxis]
+    ac_power = df['Gen.W'].values.astype(float)[:, np.newaxis]
+    dc_power = df['Inv.DC.P.W'].values.astype(float)[:, np.newaxis]
+    pdiff = df[diff_name + '_Pdiff'].values.astype(float)[:, np.newaxis]
+    # conditions that do not depend on any threshold
+    day_time = ((df['time'] >= df['sunrise_time_after']) & (df['time'] <= df['sunset_time_before'])).values[:, np.newaxis]
+    sunny_hour = ((df['hour'] >= sun_thre_start) & (df['hour'] <= sun_thred_end) &
+                  (df[metric_name] > 50)).values[:, np.newaxis]
+    gen0 = ac_power == 0
+    low_voltage_grid = df['Inv.AC.U.V'].max() < 300
+
+    labels = {}
+    with np.errstate(invalid='ignore'):
+        # # ==== AC generation is zero
+        labels['grid_overVol'] = (ac_vol > col('ac_overvoltage_threshold')) & low_voltage_grid & gen0 & day_time
+        labels['blakout'] = (ac_vol < col('ac_blackout_vol_threshold')) & low_voltage_grid & gen0 & day_time
+        in_range = gen0 & (ac_vol >= col('ac_blackout_vol_threshold')) & (ac_vol <= col('ac_overvoltage_threshold'))
+        labels['undersize_mppt_InVol'] = in_range & (dc_vol > ac_vol) & day_time
+        labels['DC_issue_Gen0'] = in_range & (dc_vol <= ac_vol) & day_time
+
+        # # ==== AC flat generation
+        potential_clip = (pdiff <= col('threshold_performance_clipp_upper')) & \
+                         (pdiff >= col('threshold_performance_clipp_lower')) & sunny_hour
+        is_clipping = potential_clip & (run_length_duration(potential_clip) >= col('threshold_clipp_time'))
+        labels['volt_watt'] = is_clipping & (ac_vol > col('acvoltage_volt_watt_threshold')) & low_voltage_grid
+        labels['volt_var'] = is_clipping & (ac_vol <= col('acvoltage_volt_watt_threshold')) & \
+                             (ac_vol > col('acvoltage_volt_var_threshold'))
+        labels['inverter_clipping'] = is_clipping & (ac_vol <= col('acvoltage_volt_var_threshold')) & \
+                                      low_voltage_grid & (dc_power > 1.1 * ac_power) & day_time
+        labels['DCside_issue_flat'] = is_clipping & (ac_vol <= col('acvoltage_volt_var_threshold')) & \
+                                      (dc_power <= ac_power)
+    return labels
+
+
+# ======================================================================================
+# = Summary of the sweep
+# ======================================================================================
+def align_reference(df, df_reference, MID_full):
+    """
+    fetch the reference labels of a monitor at the time slots of the preprocessed dataframe
+    :param df: preprocessed dataframe of one monitor
+    :param df_reference: wide labelling result, e.g., results/df_inverter_clipping.csv ('time' + one column per monitor)
+    :param MID_full: monitor column name
+    :return: boolean array, or None if the monitor is not in the reference
+    """
+    # the saved results use either the full 'MNTR|...' name or the bare monitor id as column name
+    for column in [MID_full, MID_full.split('|')[-1]]:
+        if column in df_reference.columns:
+            reference = df['time'].map(df_reference.set_index(pd.to_datetime(df_reference['time']))[column])
+            return reference.fillna(False).astype(bool).values
+    return None
+
+
+def summarise_sweep(df_grid, label_counts, confusion):
+    """
+    :param df_grid: threshold configurations
+    :param label_counts: dict {label name: int array (configuration)}
+    :param confusion: dict {label name: int array (configuration x [tp, fp, fn, tn])}
+    :return: DataFrame, one row per configuration with the thresholds, label counts and agreement
+    """
+    df_summary = df_grid.copy()
+    for label_name in sweep_label_names:
+        df_summary[label_name + '_count'] = label_counts[label_name]
+    for label_name, counts in confusion.items():
+        tp, fp, fn, tn = counts[:, 0], counts[:, 1], counts[:, 2], counts[:, 3]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df_summary[label_name + '_agreement'] = (tp + tn) / (tp + fp + fn + tn)
+            df_summary[label_name + '_precision'] = tp / (tp + fp)
+            df_summary[label_name + '_recall'] = tp / (tp + fn)
+            df_summary[label_name + '_f1'] = 2 * tp / (2 * tp + fp + fn)
+    return df_summary